@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +89,34 @@ DATABASES = {
     }
 }
 
+# Read replicas as comma separated HOST[/NAME][=WEIGHT] entries, which take
+# the primary's other settings. Views using ReplicaReadMixin read from one,
+# picked by weight, unless the user wrote in the last REPLICA_PIN_SECONDS.
+# REPLICA_PIN_CACHE_ALIAS must then name an alias from CACHES that every
+# process shares, such as Redis or Memcached, so pins reach all workers.
+DATABASE_REPLICAS = {}
+for index, replica in enumerate(
+    filter(None, os.environ.get('DB_REPLICAS', '').split(','))
+):
+    location, _, weight = replica.partition('=')
+    host, _, name = location.partition('/')
+    alias = f'replica{index}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        HOST=host,
+        NAME=name or DATABASES['default']['NAME'],
+        TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS[alias] = float(weight or 1)
+
+# Check persistent connections (CONN_MAX_AGE) still work as each request
+# starts, dropping those the database closed
+DB_HEALTH_CHECKS = False
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_CACHE_ALIAS = None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -132,3 +161,42 @@ STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
 
 AUTH_USER_MODEL = 'core.user'
+
+# Cache of token -> user lookups used by CachedTokenAuthentication. Lookups
+# are only cached in an alias from CACHES that every process shares, such
+# as Redis or Memcached, so revoked tokens stop working everywhere at once.
+# Until TOKEN_AUTH_CACHE_ALIAS is set nothing is cached, and every request
+# looks its token up in the database as TokenAuthentication does.
+TOKEN_AUTH_CACHE_TIMEOUT = 60
+TOKEN_AUTH_CACHE_ALIAS = None
+
+# Cache of recipe, tag and ingredient reads. Entries are keyed by each
+# user's change version, so set an alias from CACHES to share them safely.
+# Each process keeps up to RECIPE_CACHE_SIZE pages, holding at most
+# RECIPE_CACHE_MAX_BYTES between them.
+RECIPE_CACHE_SIZE = 5000
+RECIPE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RECIPE_CACHE_TIMEOUT = 300
+RECIPE_CACHE_ALIAS = None
+
+# Serialize list pages from values() rows rather than model instances
+RECIPE_FAST_LISTS = False
+
+# Bearer token Prometheus must send to read /metrics. Without one, only
+# staff signed in to a session can read them.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Keep statements slower than this many milliseconds, with a sampled
+# EXPLAIN (ANALYZE, BUFFERS), for staff at /api/recipe/slow-queries/.
+# None turns the log off.
+SLOW_QUERY_MS = float(os.environ['SLOW_QUERY_MS']) \
+    if os.environ.get('SLOW_QUERY_MS') else None
+SLOW_QUERY_LOG_SIZE = 100
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+
+# Worker threads rendering resized recipe image variants
+RECIPE_IMAGE_WORKERS = 2
+
+# Limits checked while a recipe image is uploaded, before it is decoded
+RECIPE_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 25000000
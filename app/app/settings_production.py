@@ -0,0 +1,69 @@
+"""
+Production settings for app project.
+
+Select them with DJANGO_SETTINGS_MODULE=app.settings_production. They
+start from app.settings and replace what only suits development.
+"""
+
+import os
+
+from app.settings import *  # noqa: F401,F403
+from app.settings import DATABASES, TEMPLATES
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+# Prometheus must send this bearer token to read /metrics
+METRICS_TOKEN = os.environ['METRICS_TOKEN']
+
+DEBUG = False
+
+ALLOWED_HOSTS = list(
+    filter(None, os.environ.get('ALLOWED_HOSTS', '').split(','))
+)
+
+# Keep database connections open between requests for this many seconds,
+# checking they still work as each request starts
+DATABASES = {
+    alias: dict(
+        database,
+        CONN_MAX_AGE=int(os.environ.get('DB_CONN_MAX_AGE', 60))
+    )
+    for alias, database in DATABASES.items()
+}
+DB_HEALTH_CHECKS = True
+
+# Serialize list pages from values() rows rather than model instances
+RECIPE_FAST_LISTS = True
+
+# Compile templates once per process
+TEMPLATES = [
+    dict(
+        TEMPLATES[0],
+        APP_DIRS=False,
+        OPTIONS={
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        }
+    ),
+]
+
+# JSON only, without the browsable API
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
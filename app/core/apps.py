@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import signals  # noqa: F401
+        from core.replicas import check_pin_cache
+
+        check_pin_cache()
@@ -0,0 +1,159 @@
+import itertools
+import math
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.models import Ingredient, Recipe, Tag
+
+WORDS = [
+    'apple', 'basil', 'beef', 'bread', 'butter', 'carrot', 'cheese',
+    'chicken', 'chili', 'coconut', 'curry', 'egg', 'garlic', 'ginger',
+    'lemon', 'lentil', 'mushroom', 'noodle', 'onion', 'pasta', 'pepper',
+    'potato', 'rice', 'salmon', 'spinach', 'tofu', 'tomato', 'walnut',
+]
+DISHES = ['soup', 'stew', 'salad', 'pie', 'bake', 'stir fry', 'roast']
+# Added to one title in RARE_EVERY, to time a selective search
+RARE_WORD = 'saffron'
+RARE_EVERY = 1000
+
+
+def analyze_tables():
+    """Refresh planner statistics for the recipe tables"""
+    with connection.cursor() as cursor:
+        for table in ['core_recipe', 'core_tag', 'core_ingredient',
+                      'core_recipe_tags', 'core_recipe_ingredients']:
+            cursor.execute(f'ANALYZE {table}')
+
+
+def zipf_weights(count, exponent=1.1):
+    """Return cumulative Zipf weights for count items, most popular first"""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def zipf_sample(rng, population, cum_weights, k):
+    """Return k distinct items of population, drawn by their weights"""
+    chosen = {}
+    k = min(k, len(population))
+    while len(chosen) < k:
+        for item in rng.choices(population, cum_weights=cum_weights,
+                                k=k - len(chosen)):
+            chosen.setdefault(item.pk, item)
+
+    return list(chosen.values())
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+
+    return ordered[rank - 1]
+
+
+class BenchmarkCommand(BaseCommand):
+    """Base for commands timing queries against seeded recipes
+
+    Subclasses should seed inside a transaction they roll back, so the
+    database is left as it was.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument(
+            '--ingredients',
+            type=int,
+            default=len(WORDS),
+            help='Distinct ingredients to link recipes to'
+        )
+        parser.add_argument('--runs', type=int, default=20)
+
+    def seed(self, count, ingredient_count=len(WORDS),
+             email='benchmark@example.com'):
+        """Create a user with count recipes linked to tags and ingredients
+
+        Each recipe gets two tags and three ingredients. Ingredient names
+        beyond the WORDS list are numbered variants of them.
+        """
+        self.stdout.write(f'Seeding {count} recipes...')
+        rng = random.Random(0)
+        user = get_user_model().objects.create_user(email)
+        tags = Tag.objects.bulk_create(
+            [Tag(user=user, name=name) for name in DISHES]
+        )
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(
+                user=user,
+                name=WORDS[i] if i < len(WORDS) else
+                f'{WORDS[i % len(WORDS)]} {i}'
+            )
+            for i in range(ingredient_count)
+        ], batch_size=5000)
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=' '.join([
+                    rng.choice(WORDS),
+                    rng.choice(DISHES),
+                    RARE_WORD if i % RARE_EVERY == 0 else str(i)
+                ]),
+                time_minutes=30,
+                price=5
+            )
+            for i in range(count)
+        ], batch_size=5000)
+
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in recipes
+            for tag in rng.sample(tags, 2)
+        ], batch_size=5000)
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(
+                recipe_id=recipe.id,
+                ingredient_id=ingredient.id
+            )
+            for recipe in recipes
+            for ingredient in rng.sample(ingredients, 3)
+        ], batch_size=5000)
+
+        self.analyze()
+        Recipe.objects.filter(user=user).update_search_vector()
+        self.analyze()
+
+        return user
+
+    def analyze(self):
+        """Refresh planner statistics for the seeded tables"""
+        analyze_tables()
+
+    def time_page(self, queryset, runs, page_size=100):
+        """Return the milliseconds taken to fetch a page, once per run"""
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            list(queryset[:page_size])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return timings
+
+    def report(self, label, timings):
+        """Write the median and worst of a list of timings"""
+        self.stdout.write(
+            f'  {label}: median {statistics.median(timings):.2f} ms, '
+            f'max {max(timings):.2f} ms over {len(timings)} runs'
+        )
+
+    def explain(self, queryset, page_size=100):
+        """Return the EXPLAIN ANALYZE output for a page of queryset"""
+        sql, params = queryset[:page_size].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN ANALYZE {sql}', params)
+
+            return '\n'.join(row[0] for row in cursor.fetchall())
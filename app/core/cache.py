@@ -0,0 +1,168 @@
+import pickle
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+MISSING = object()
+
+_tiered_caches = weakref.WeakSet()
+
+
+def tiered_caches():
+    """Return every TieredCache created in this process"""
+    return list(_tiered_caches)
+
+
+def pickled_size(value):
+    """Return the number of bytes value takes pickled"""
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+class LRUCache:
+    """Thread-safe in-process cache bounded by size and entry age
+
+    With max_bytes, the entries' total pickled size is bounded too, and a
+    value larger than that on its own isn't kept.
+    """
+
+    def __init__(self, max_size, timeout, max_bytes=None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the live value for key, or default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value, _ = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+            self.misses += 1
+
+            return default
+
+    def set(self, key, value, timeout=None):
+        """Store value under key, evicting the least recently used entries"""
+        if timeout is None:
+            timeout = self.timeout
+        size = pickled_size(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + timeout, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_size or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        """Remove key if it is cached"""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _remove(self, key):
+        """Drop key's entry, with the lock held"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def stats(self):
+        """Return the cache's size and hit/miss counters"""
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class TieredCache:
+    """An in-process LRUCache in front of an optional Django cache
+
+    Deleting a key clears it from the shared cache, but other processes
+    may keep serving their local copy until its timeout, so keep the
+    local timeout short for data that must be revoked quickly.
+    """
+
+    def __init__(self, prefix, max_size, timeout, cache_alias=None,
+                 shared_timeout=None, max_bytes=None):
+        self.prefix = prefix
+        self.local = LRUCache(max_size, timeout, max_bytes)
+        self.cache_alias = cache_alias
+        self.shared_timeout = shared_timeout or timeout
+        self.shared_hits = 0
+        _tiered_caches.add(self)
+
+    @property
+    def shared(self):
+        """Return the Django cache backing this cache, if any"""
+        if self.cache_alias is None:
+            return None
+
+        return caches[self.cache_alias]
+
+    def make_key(self, key):
+        """Return the shared cache key for key"""
+        return f'{self.prefix}:{key}'
+
+    def get(self, key, default=None):
+        """Return the value for key from the nearest tier holding it"""
+        value = self.local.get(key, MISSING)
+        if value is MISSING and self.shared is not None:
+            value = self.shared.get(self.make_key(key), MISSING)
+            if value is not MISSING:
+                self.shared_hits += 1
+                self.local.set(key, value)
+        if value is MISSING:
+            return default
+
+        return value
+
+    def set(self, key, value):
+        """Store value under key in both tiers"""
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(self.make_key(key), value, self.shared_timeout)
+
+    def delete(self, key):
+        """Remove key from both tiers"""
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self.make_key(key))
+
+    def clear(self):
+        """Empty the local tier and reset the counters"""
+        self.local.clear()
+        self.shared_hits = 0
+
+    def stats(self):
+        """Return hit/miss counters for both tiers"""
+        stats = self.local.stats()
+        stats['shared_hits'] = self.shared_hits
+        stats['misses'] = stats['misses'] - self.shared_hits
+
+        return stats
@@ -0,0 +1,284 @@
+import io
+import json
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.benchmark import percentile
+from core.management.commands.seed_benchmark import BENCHMARK_EMAIL, \
+    BENCHMARK_PASSWORD
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import response_cache
+
+
+class Command(BaseCommand):
+    """Time every recipe and user endpoint in-process with APIClient
+
+    Run seed_benchmark first. Requests go through the whole middleware
+    and authentication stack, without a server. Writes are rolled back
+    when the run ends, and uploaded images go to a temporary directory.
+    """
+    help = 'Benchmark the API endpoints against seeded benchmark data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default=BENCHMARK_EMAIL.format(0),
+                            help='Seeded user to make requests as')
+        parser.add_argument('--runs', type=int, default=30,
+                            help='Requests per route')
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Keep the response cache between requests'
+        )
+        parser.add_argument('--output', default='benchmark.json',
+                            help='File to save the results to as JSON')
+        parser.add_argument('--compare',
+                            help='Earlier results file to compare with')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(
+                f'No user {options["user"]}; run seed_benchmark first'
+            )
+        if not Recipe.objects.filter(user=user).exists():
+            raise CommandError(f'{user.email} has no recipes to request')
+
+        results = {}
+        # APIClient requests are made to the host 'testserver'
+        allowed_hosts = settings.ALLOWED_HOSTS + ['testserver']
+        with transaction.atomic(), \
+                tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root,
+                                  ALLOWED_HOSTS=allowed_hosts):
+            for name, request in self.scenarios(user, options['runs']):
+                results[name] = self.run(request, options)
+                self.report(name, results[name])
+            transaction.set_rollback(True)
+
+        output = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'user': user.email,
+            'recipes': Recipe.objects.filter(user=user).count(),
+            'runs': options['runs'],
+            'warm': options['warm'],
+            'routes': results,
+        }
+        with open(options['output'], 'w') as file:
+            json.dump(output, file, indent=2)
+        self.stdout.write(f'Saved results to {options["output"]}')
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def scenarios(self, user, runs):
+        """Yield (name, request) for each route, request taking a run index
+
+        Each request returns the response, with any streamed content read.
+        """
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        staff = get_user_model().objects.create_user(
+            'bench-staff@example.com',
+            is_staff=True
+        )
+        staff_client = APIClient()
+        staff_client.credentials(HTTP_AUTHORIZATION='Token {}'.format(
+            Token.objects.create(user=staff).key
+        ))
+        anonymous = APIClient()
+
+        recipes = Recipe.objects.filter(user=user).order_by('-id')
+        recipe = recipes.first()
+        tag = Tag.objects.filter(user=user).with_recipe_count().order_by(
+            '-recipe_count'
+        ).first()
+        ingredient = Ingredient.objects.filter(
+            user=user
+        ).with_recipe_count().order_by('-recipe_count').first()
+        word = recipe.title.split()[0]
+        tag_names = list(
+            Tag.objects.filter(user=user).values_list('name', flat=True)[:5]
+        )
+        # DELETE needs a recipe of its own for every run
+        doomed = Recipe.objects.bulk_create([
+            Recipe(user=user, title=f'Doomed {i}', time_minutes=1, price=1)
+            for i in range(runs)
+        ])
+        payload = {
+            'title': 'Benchmark pie',
+            'time_minutes': 30,
+            'price': '9.99',
+            'tags': [tag.id] if tag else [],
+            'ingredients': [ingredient.id] if ingredient else [],
+        }
+
+        def url(name, *args):
+            return reverse(f'recipe:{name}', args=args)
+
+        yield 'GET recipe:api-root', \
+            lambda i: client.get(url('api-root'))
+        for model in ('tag', 'ingredient'):
+            names = tag_names if model == 'tag' else [word]
+            yield f'GET recipe:{model}-list', \
+                lambda i, model=model: client.get(url(f'{model}-list'))
+            yield f'GET recipe:{model}-list?with_counts&assigned_only', \
+                lambda i, model=model: client.get(
+                    url(f'{model}-list'),
+                    {'with_counts': 1, 'assigned_only': 1}
+                )
+            yield f'POST recipe:{model}-list', \
+                lambda i, model=model: client.post(
+                    url(f'{model}-list'),
+                    {'name': f'Benchmark {model} {i}'}
+                )
+            yield f'POST recipe:{model}-bulk-get-or-create', \
+                lambda i, model=model, names=names: client.post(
+                    url(f'{model}-bulk-get-or-create'),
+                    {'names': names},
+                    format='json'
+                )
+            yield f'GET recipe:{model}-autocomplete', \
+                lambda i, model=model: client.get(
+                    url(f'{model}-autocomplete'),
+                    {'q': word[:2]}
+                )
+        yield 'GET recipe:recipe-list', \
+            lambda i: client.get(url('recipe-list'))
+        etag = client.get(url('recipe-list'))['ETag']
+        yield 'GET recipe:recipe-list (304)', \
+            lambda i: client.get(url('recipe-list'), HTTP_IF_NONE_MATCH=etag)
+        yield 'GET recipe:recipe-list?fields', \
+            lambda i: client.get(url('recipe-list'), {'fields': 'id,title'})
+        if tag:
+            yield 'GET recipe:recipe-list?tags', \
+                lambda i: client.get(url('recipe-list'), {'tags': tag.id})
+        yield 'GET recipe:recipe-list?search', \
+            lambda i: client.get(url('recipe-list'), {'search': word})
+        yield 'POST recipe:recipe-list', \
+            lambda i: client.post(url('recipe-list'), payload, format='json')
+        yield 'GET recipe:recipe-detail', \
+            lambda i: client.get(url('recipe-detail', recipe.id))
+        yield 'PUT recipe:recipe-detail', \
+            lambda i: client.put(
+                url('recipe-detail', recipe.id),
+                dict(payload, title=f'Benchmark pie {i}'),
+                format='json'
+            )
+        yield 'PATCH recipe:recipe-detail', \
+            lambda i: client.patch(
+                url('recipe-detail', recipe.id),
+                {'time_minutes': i + 1}
+            )
+        yield 'DELETE recipe:recipe-detail', \
+            lambda i: client.delete(url('recipe-detail', doomed[i].id))
+        yield 'POST recipe:recipe-upload-image', \
+            lambda i: client.post(
+                url('recipe-upload-image', recipe.id),
+                {'image': sample_image()},
+                format='multipart'
+            )
+        yield 'GET recipe:recipe-facets', \
+            lambda i: client.get(url('recipe-facets'))
+        yield 'GET recipe:recipe-export', \
+            lambda i: client.get(url('recipe-export'))
+        yield 'GET recipe:cache-stats', \
+            lambda i: staff_client.get(url('cache-stats'))
+        yield 'GET recipe:slow-queries', \
+            lambda i: staff_client.get(url('slow-queries'))
+        yield 'POST user:create', \
+            lambda i: anonymous.post(reverse('user:create'), {
+                'email': f'bench-new-{i}@example.com',
+                'password': BENCHMARK_PASSWORD,
+                'name': 'New user',
+            })
+        yield 'POST user:token', \
+            lambda i: anonymous.post(reverse('user:token'), {
+                'email': user.email,
+                'password': BENCHMARK_PASSWORD,
+            })
+        yield 'GET user:me', \
+            lambda i: client.get(reverse('user:me'))
+        yield 'PATCH user:me', \
+            lambda i: client.patch(reverse('user:me'), {'name': f'Bench {i}'})
+
+    def run(self, request, options):
+        """Make request once per run, returning its timing statistics"""
+        timings = []
+        queries = []
+        statuses = set()
+        for i in range(options['runs']):
+            if not options['warm']:
+                response_cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = request(i)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured.captured_queries))
+            statuses.add(response.status_code)
+
+        return {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'queries': round(sum(queries) / len(queries), 2),
+            'requests_per_second': round(len(timings) * 1000 / sum(timings),
+                                         1),
+            'statuses': sorted(statuses),
+        }
+
+    def report(self, name, result):
+        """Write one route's results"""
+        self.stdout.write(
+            f'{name}: p50 {result["p50_ms"]:.2f} ms, '
+            f'p95 {result["p95_ms"]:.2f} ms, p99 {result["p99_ms"]:.2f} ms, '
+            f'{result["queries"]:g} queries, '
+            f'{result["requests_per_second"]:.0f} req/s, '
+            f'status {"/".join(map(str, result["statuses"]))}'
+        )
+
+    def compare(self, path, results):
+        """Write each route's p50 change from an earlier results file"""
+        with open(path) as file:
+            previous = json.load(file)['routes']
+
+        self.stdout.write(f'Compared with {path}:')
+        for name, result in results.items():
+            if name not in previous:
+                continue
+            before = previous[name]['p50_ms']
+            change = (result['p50_ms'] - before) / before * 100
+            self.stdout.write(
+                f'  {name}: p50 {before:.2f} -> {result["p50_ms"]:.2f} ms '
+                f'({change:+.0f}%)'
+            )
+
+
+def sample_image():
+    """Return a small JPEG upload"""
+    data = io.BytesIO()
+    Image.new('RGB', (64, 64), 'orange').save(data, format='JPEG')
+    data.name = 'benchmark.jpg'
+    data.seek(0)
+
+    return data
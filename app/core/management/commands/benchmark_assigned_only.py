@@ -0,0 +1,43 @@
+from django.db import transaction
+
+from core.benchmark import BenchmarkCommand
+from core.models import Ingredient, Tag
+
+
+class Command(BenchmarkCommand):
+    """Compare assigned_only as a join with DISTINCT against EXISTS"""
+    help = 'Time listing assigned tags and ingredients, old and new plans'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(ingredients=2000)
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Print the EXPLAIN ANALYZE output of each query'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options['recipes'], options['ingredients'])
+            for model in (Tag, Ingredient):
+                objects = model.objects.filter(user=user)
+                queries = [
+                    ('join + distinct', objects.filter(
+                        recipe__isnull=False
+                    ).order_by('-name', '-id').distinct()),
+                    ('exists', objects.assigned().order_by('-name', '-id')),
+                    ('exists + counts', objects.assigned().with_recipe_count(
+                    ).order_by('-name', '-id')),
+                ]
+
+                self.stdout.write(f'{model._meta.verbose_name_plural}:')
+                for label, queryset in queries:
+                    self.report(
+                        label,
+                        self.time_page(queryset, options['runs'])
+                    )
+                    if options['explain']:
+                        self.stdout.write(self.explain(queryset))
+
+            transaction.set_rollback(True)
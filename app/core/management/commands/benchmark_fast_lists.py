@@ -0,0 +1,95 @@
+import time
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from core.benchmark import BenchmarkCommand
+from core.models import Ingredient, Recipe, Tag
+from recipe.fastlist import FastListSerializer
+from recipe.serializers import IngredientCountSerializer, RecipeSerializer
+
+
+class Command(BenchmarkCommand):
+    """Compare list serialization from model instances and values() rows"""
+    help = 'Time serializing list pages with DRF and the fast list path'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(recipes=5000, ingredients=2000)
+        parser.add_argument('--page-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options['recipes'], options['ingredients'])
+            recipes = Recipe.objects.filter(user=user).defer(
+                'search_vector'
+            ).order_by('-id').prefetch_related(*[
+                Prefetch(name, model.objects.only('id').order_by('id'))
+                for name, model in (('tags', Tag), ('ingredients', Ingredient))
+            ])
+            ingredients = Ingredient.objects.filter(
+                user=user
+            ).with_recipe_count().order_by('-name', '-id')
+
+            for label, serializer_class, queryset in [
+                ('recipes', RecipeSerializer, recipes),
+                ('ingredients with counts', IngredientCountSerializer,
+                 ingredients),
+            ]:
+                self.stdout.write(
+                    f'{label}, pages of {options["page_size"]}:'
+                )
+                functions = [
+                    (name, partial(function, serializer_class, queryset,
+                                   options['page_size']))
+                    for name, function in [('serializer', self.serialize),
+                                           ('fast', self.fast_serialize)]
+                ]
+                if functions[0][1]() != functions[1][1]():
+                    self.stderr.write('  outputs differ')
+
+                medians = []
+                for name, function in functions:
+                    timings = self.time_calls(function, options['runs'])
+                    self.report(name, timings)
+                    medians.append(sorted(timings)[len(timings) // 2])
+                self.stdout.write(f'  speedup: {medians[0] / medians[1]:.1f}x')
+
+            transaction.set_rollback(True)
+
+    def get_context(self):
+        """Return serializer context for a request to a list endpoint"""
+        return {'request': Request(RequestFactory().get('/api/recipe/'))}
+
+    def serialize(self, serializer_class, queryset, page_size):
+        """Render a page serialized from model instances"""
+        serializer = serializer_class(
+            list(queryset[:page_size]),
+            many=True,
+            context=self.get_context()
+        )
+
+        return JSONRenderer().render(serializer.data)
+
+    def fast_serialize(self, serializer_class, queryset, page_size):
+        """Render a page serialized from values() rows"""
+        serializer = FastListSerializer(
+            serializer_class(context=self.get_context())
+        )
+        page = list(serializer.values(queryset)[:page_size])
+
+        return JSONRenderer().render(serializer.to_representation(page))
+
+    def time_calls(self, function, runs):
+        """Return the milliseconds taken by each of runs calls"""
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return timings
@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models import Q
+
+from core.benchmark import RARE_WORD, BenchmarkCommand
+from core.models import Recipe
+
+
+class Command(BenchmarkCommand):
+    """Compare full-text recipe search with naive substring matching"""
+    help = 'Time recipe full-text search against icontains filtering'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--term',
+            action='append',
+            help=f'Search term to time (default: {RARE_WORD} and tomato)'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options['recipes'], options['ingredients'])
+            recipes = Recipe.objects.filter(user=user)
+            for term in options['term'] or [RARE_WORD, 'tomato']:
+                naive = recipes.filter(
+                    Q(title__icontains=term) |
+                    Q(tags__name__icontains=term) |
+                    Q(ingredients__name__icontains=term)
+                ).distinct().order_by('-id')
+                matches = recipes.search(term).count()
+                self.stdout.write(f'"{term}" matches {matches} recipes')
+
+                for label, queryset in [('search', recipes.search(term)),
+                                        ('icontains', naive)]:
+                    self.report(
+                        label,
+                        self.time_page(queryset, options['runs'])
+                    )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,210 @@
+import json
+import platform
+import resource
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import percentile
+from core.management.commands.seed_benchmark import BENCHMARK_EMAIL
+from core.models import Recipe, Tag
+from recipe.cache import response_cache
+
+
+class Command(BaseCommand):
+    """Time read requests through the WSGI application
+
+    Run seed_benchmark first. Unlike benchmark_api, each request goes
+    through the WSGI handler and its request signals, so the settings for
+    connection reuse, DEBUG and the renderers all show. Run it once per
+    settings module and compare, for example:
+
+        manage.py benchmark_wsgi --output dev.json
+        manage.py benchmark_wsgi --settings app.settings_production \\
+            --output production.json --compare dev.json
+    """
+    help = 'Benchmark throughput and memory use under the current settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default=BENCHMARK_EMAIL.format(0),
+                            help='Seeded user to make requests as')
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Requests to time')
+        parser.add_argument('--memory-requests', type=int, default=100,
+                            help='Requests to trace memory allocations of')
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Keep the response cache between requests'
+        )
+        parser.add_argument('--output', default='benchmark-wsgi.json',
+                            help='File to save the results to as JSON')
+        parser.add_argument('--compare',
+                            help='Earlier results file to compare with')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(
+                f'No user {options["user"]}; run seed_benchmark first'
+            )
+        recipe = Recipe.objects.filter(user=user).order_by('-id').first()
+        if recipe is None:
+            raise CommandError(f'{user.email} has no recipes to request')
+        token, _ = Token.objects.get_or_create(user=user)
+
+        paths = [
+            reverse('recipe:recipe-list'),
+            reverse('recipe:recipe-detail', args=[recipe.id]),
+            reverse('recipe:recipe-list') + '?search=' +
+            recipe.title.split()[0],
+            reverse('recipe:tag-list'),
+            reverse('recipe:ingredient-list') + '?with_counts=1',
+            reverse('user:me'),
+        ]
+        tag = Tag.objects.filter(user=user).first()
+        if tag is not None:
+            paths.append(reverse('recipe:recipe-list') + f'?tags={tag.id}')
+        headers = {
+            'HTTP_AUTHORIZATION': f'Token {token.key}',
+            'HTTP_ACCEPT': '*/*',
+        }
+
+        application = get_wsgi_application()
+        # RequestFactory requests are made to the host 'testserver'
+        allowed_hosts = settings.ALLOWED_HOSTS + ['testserver']
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            result = self.run(application, paths, headers, options)
+
+        output = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'settings': settings.SETTINGS_MODULE,
+            'debug': settings.DEBUG,
+            'conn_max_age': connections['default'].settings_dict[
+                'CONN_MAX_AGE'
+            ],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'user': user.email,
+            'warm': options['warm'],
+            'result': result,
+        }
+        self.report(output)
+        with open(options['output'], 'w') as file:
+            json.dump(output, file, indent=2)
+        self.stdout.write(f'Saved results to {options["output"]}')
+
+        if options['compare']:
+            self.compare(options['compare'], output)
+
+    def run(self, application, paths, headers, options):
+        """Make the requests, returning throughput and memory statistics"""
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        timings = []
+        statuses = set()
+        connection_created.connect(count_connection, weak=False)
+        try:
+            start = time.perf_counter()
+            for i in range(options['requests']):
+                path = paths[i % len(paths)]
+                if not options['warm']:
+                    response_cache.clear()
+                request_start = time.perf_counter()
+                statuses.add(self.request(application, path, headers))
+                timings.append((time.perf_counter() - request_start) * 1000)
+            elapsed = time.perf_counter() - start
+        finally:
+            connection_created.disconnect(count_connection)
+
+        peaks = []
+        for i in range(options['memory_requests']):
+            if not options['warm']:
+                response_cache.clear()
+            tracemalloc.start()
+            try:
+                self.request(application, paths[i % len(paths)], headers)
+                peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            finally:
+                tracemalloc.stop()
+
+        return {
+            'requests': len(timings),
+            'requests_per_second': round(len(timings) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'connections_opened': len(opened),
+            'peak_kb_per_request': round(sum(peaks) / len(peaks), 1)
+            if peaks else None,
+            # ru_maxrss is in kilobytes on Linux
+            'max_rss_mb': round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+            ),
+            'statuses': sorted(statuses),
+        }
+
+    def request(self, application, path, headers):
+        """Make one GET request to application, returning its status code"""
+        environ = RequestFactory().get(path, **headers).environ
+        status = []
+
+        def start_response(status_line, response_headers, exc_info=None):
+            status.append(int(status_line.split()[0]))
+
+        response = application(environ, start_response)
+        try:
+            for _ in response:
+                pass
+        finally:
+            # Ends the request as a WSGI server would, which lets Django
+            # close or keep the database connections
+            response.close()
+
+        return status[0]
+
+    def report(self, output):
+        """Write the results of a run"""
+        result = output['result']
+        self.stdout.write(
+            f'{output["settings"]} (DEBUG={output["debug"]}, '
+            f'CONN_MAX_AGE={output["conn_max_age"]}): '
+            f'{result["requests_per_second"]:.0f} req/s, '
+            f'p50 {result["p50_ms"]:.2f} ms, '
+            f'p95 {result["p95_ms"]:.2f} ms, '
+            f'{result["connections_opened"]} connections opened, '
+            f'{result["peak_kb_per_request"]} KB peak per request, '
+            f'{result["max_rss_mb"]} MB max RSS, '
+            f'status {"/".join(map(str, result["statuses"]))}'
+        )
+
+    def compare(self, path, output):
+        """Write the change in each statistic from an earlier results file"""
+        with open(path) as file:
+            previous = json.load(file)
+
+        self.stdout.write(f'Compared with {path} ({previous["settings"]}):')
+        for name in ('requests_per_second', 'p50_ms', 'p95_ms',
+                     'connections_opened', 'peak_kb_per_request',
+                     'max_rss_mb'):
+            before = previous['result'][name]
+            after = output['result'][name]
+            change = f' ({(after - before) / before * 100:+.0f}%)' \
+                if before and after is not None else ''
+            self.stdout.write(f'  {name}: {before} -> {after}{change}')
@@ -0,0 +1,228 @@
+import csv
+import io
+import itertools
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import ChangeVersion, Ingredient, Recipe, Tag
+from recipe.renderers import CSVRenderer
+
+# Recipe columns read from each record, validated by the model's fields
+RECIPE_COLUMNS = ('title', 'time_minutes', 'price', 'link')
+RELATED_MODELS = (('tags', Tag), ('ingredients', Ingredient))
+
+
+class Command(BaseCommand):
+    """Import recipes from an NDJSON or CSV export in batches
+
+    Records use the recipe export's format: tags and ingredients are given
+    by name and created for the user if they don't have them. On
+    PostgreSQL recipes and their links are loaded with COPY. The import is
+    a single transaction, so an invalid record leaves nothing behind.
+    """
+    help = 'Import recipes for a user from an NDJSON or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for stdin')
+        parser.add_argument('--user', required=True,
+                            help='Email of the user to import recipes for')
+        parser.add_argument(
+            '--format',
+            choices=('ndjson', 'csv'),
+            help='Input format (default: from the file extension)'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["user"]}')
+
+        path = options['path']
+        input_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson'
+        )
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        else:
+            stream = open(path, encoding='utf-8', newline='')
+
+        start = time.perf_counter()
+        total = 0
+        with stream, transaction.atomic():
+            records = self.read(stream, input_format)
+            while True:
+                batch = list(itertools.islice(records, options['batch_size']))
+                if not batch:
+                    break
+                self.import_batch(user, batch)
+                total += len(batch)
+                self.stdout.write(
+                    f'Imported {total} recipes '
+                    f'({self.rate(total, start):.0f}/s)'
+                )
+            ChangeVersion.objects.filter(user=user).bump()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {total} recipes in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def read(self, stream, input_format):
+        """Yield each input record, validated"""
+        if input_format == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                for name, _ in RELATED_MODELS:
+                    try:
+                        row[name] = CSVRenderer.decode_list(
+                            row.get(name) or ''
+                        )
+                    except ValueError as exc:
+                        raise CommandError(
+                            f'Line {reader.line_num}: {name}: {exc}'
+                        )
+                yield self.clean(row, reader.line_num)
+        else:
+            for number, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    raise CommandError(f'Line {number}: {exc}')
+                yield self.clean(row, number)
+
+    def clean(self, row, number):
+        """Return a record's recipe fields and related names, validated"""
+        if not isinstance(row, dict):
+            raise CommandError(f'Line {number}: expected an object')
+
+        record = {}
+        for name in RECIPE_COLUMNS:
+            field = Recipe._meta.get_field(name)
+            value = row.get(name)
+            if value is None and field.blank:
+                value = ''
+            try:
+                record[name] = field.clean(value, None)
+            except ValidationError as exc:
+                raise CommandError(
+                    f'Line {number}: {name}: {" ".join(exc.messages)}'
+                )
+        for name, _ in RELATED_MODELS:
+            names = row.get(name) or []
+            if not isinstance(names, list) or \
+                    not all(isinstance(value, str) and value.strip()
+                            for value in names):
+                raise CommandError(
+                    f'Line {number}: {name}: expected a list of names'
+                )
+            record[name] = [value.strip() for value in names]
+
+        return record
+
+    def import_batch(self, user, records):
+        """Insert a batch of records with their tags and ingredients"""
+        links = {}
+        for name, model in RELATED_MODELS:
+            names = [value for record in records for value in record[name]]
+            # One object is returned per distinct name, in first seen order
+            keys = list(dict.fromkeys(value.upper() for value in names))
+            objects = model.objects.get_or_create_many(user, names) \
+                if names else []
+            ids = {key: obj.id for key, obj in zip(keys, objects)}
+            links[name] = [
+                list(dict.fromkeys(ids[value.upper()]
+                                   for value in record[name]))
+                for record in records
+            ]
+
+        recipe_ids = self.insert_recipes(user, records)
+        for name, _ in RELATED_MODELS:
+            field = Recipe._meta.get_field(name)
+            self.insert_rows(
+                field.remote_field.through,
+                (f'{field.m2m_field_name()}_id',
+                 f'{field.m2m_reverse_field_name()}_id'),
+                [
+                    (recipe_id, related_id)
+                    for recipe_id, related_ids in zip(recipe_ids, links[name])
+                    for related_id in related_ids
+                ]
+            )
+        Recipe.objects.filter(pk__in=recipe_ids).update_search_vector()
+
+    def insert_recipes(self, user, records):
+        """Insert the records' recipes, returning their ids in order"""
+        if not self.can_copy():
+            recipes = Recipe.objects.bulk_create([
+                Recipe(user=user, **{
+                    name: record[name] for name in RECIPE_COLUMNS
+                })
+                for record in records
+            ])
+            if any(recipe.pk is None for recipe in recipes):
+                raise CommandError(
+                    'The database backend must return ids from bulk inserts'
+                )
+            return [recipe.pk for recipe in recipes]
+
+        # COPY can't return ids, so take them from the sequence up front
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [Recipe._meta.db_table, len(records)]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+
+        self.insert_rows(
+            Recipe,
+            ('id', 'user_id') + RECIPE_COLUMNS + ('image_variants',),
+            [
+                (recipe_id, user.id) + tuple(
+                    record[name] for name in RECIPE_COLUMNS
+                ) + ('{}',)
+                for recipe_id, record in zip(ids, records)
+            ]
+        )
+
+        return ids
+
+    def insert_rows(self, model, columns, rows):
+        """Insert rows of values for columns into model's table"""
+        if not rows:
+            return
+        if not self.can_copy():
+            model.objects.bulk_create([
+                model(**dict(zip(columns, row))) for row in rows
+            ])
+            return
+
+        data = io.StringIO()
+        # Quote everything, so empty strings aren't read back as NULL
+        csv.writer(data, quoting=csv.QUOTE_ALL).writerows(rows)
+        data.seek(0)
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote(model._meta.db_table)} '
+                f'({", ".join(quote(column) for column in columns)}) '
+                f'FROM STDIN WITH (FORMAT csv)',
+                data
+            )
+
+    def can_copy(self):
+        """Return whether the database can load rows with COPY"""
+        return connection.vendor == 'postgresql'
+
+    def rate(self, count, start):
+        """Return the rows per second imported since start"""
+        return count / max(time.perf_counter() - start, 1e-6)
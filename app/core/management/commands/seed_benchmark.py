@@ -0,0 +1,138 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.benchmark import DISHES, WORDS, analyze_tables, zipf_sample, \
+    zipf_weights
+from core.models import ChangeVersion, Ingredient, Recipe, Tag
+
+BENCHMARK_EMAIL = 'bench{}@example.com'
+BENCHMARK_EMAIL_REGEX = r'^bench[0-9]+@example\.com$'
+BENCHMARK_PASSWORD = 'benchmark-password'
+TAG_WORDS = [
+    'Vegan', 'Vegetarian', 'Quick', 'Dinner', 'Lunch', 'Breakfast',
+    'Dessert', 'Spicy', 'Gluten free', 'Budget', 'Family', 'Party',
+]
+
+
+class Command(BaseCommand):
+    """Create users with recipes for benchmarking the API
+
+    Tags and ingredients are picked with Zipf-like weights, so a few are
+    on most recipes and most are on a few, as in real collections.
+    Users are named bench<n>@example.com and share BENCHMARK_PASSWORD.
+    """
+    help = 'Seed benchmark users with tags, ingredients and recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument('--recipes', type=int, default=2000,
+                            help='Recipes per user')
+        parser.add_argument('--tags', type=int, default=40,
+                            help='Tags per user')
+        parser.add_argument('--ingredients', type=int, default=400,
+                            help='Ingredients per user')
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Exponent of the tag and ingredient popularity curve'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously seeded benchmark users first'
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(
+            email__regex=BENCHMARK_EMAIL_REGEX
+        )
+        if options['clear']:
+            users.delete()
+        elif users.exists():
+            raise CommandError(
+                'Benchmark users already exist; pass --clear to replace them'
+            )
+
+        start = time.perf_counter()
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            for i in range(options['users']):
+                self.seed_user(rng, BENCHMARK_EMAIL.format(i), options)
+                self.stdout.write(f'Seeded {BENCHMARK_EMAIL.format(i)}')
+
+            analyze_tables()
+            Recipe.objects.filter(
+                user__email__regex=BENCHMARK_EMAIL_REGEX
+            ).update_search_vector()
+        analyze_tables()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {options["users"]} users with {options["recipes"]} '
+            f'recipes each in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def seed_user(self, rng, email, options):
+        """Create a user with their tags, ingredients and recipes"""
+        user = get_user_model().objects.create_user(
+            email,
+            BENCHMARK_PASSWORD,
+            name=email.split('@')[0]
+        )
+        tags = Tag.objects.bulk_create([
+            Tag(user=user, name=numbered(TAG_WORDS + DISHES, i))
+            for i in range(options['tags'])
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(user=user, name=numbered(WORDS, i))
+            for i in range(options['ingredients'])
+        ], batch_size=5000)
+        # Popularity shouldn't follow creation order
+        rng.shuffle(tags)
+        rng.shuffle(ingredients)
+
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'{rng.choice(WORDS).capitalize()} '
+                      f'{rng.choice(DISHES)} {i}',
+                time_minutes=rng.randint(5, 180),
+                price=rng.randint(100, 9999) / 100,
+                link=f'https://example.com/recipes/{i}'
+                if rng.random() < 0.3 else ''
+            )
+            for i in range(options['recipes'])
+        ], batch_size=5000)
+
+        for field_name, objects, low, high in [
+            ('tags', tags, 0, 4),
+            ('ingredients', ingredients, 3, 12),
+        ]:
+            field = Recipe._meta.get_field(field_name)
+            through = field.remote_field.through
+            column = f'{field.m2m_reverse_field_name()}_id'
+            weights = zipf_weights(len(objects), options['zipf'])
+            through.objects.bulk_create([
+                through(recipe_id=recipe.id, **{column: obj.id})
+                for recipe in recipes
+                for obj in zipf_sample(rng, objects, weights,
+                                       rng.randint(low, high))
+            ], batch_size=5000)
+
+        ChangeVersion.objects.filter(user=user).bump()
+
+        return user
+
+
+def numbered(names, i):
+    """Return the i-th name, numbering repeats once names run out"""
+    name = names[i % len(names)]
+    if i >= len(names):
+        name = f'{name} {i // len(names) + 1}'
+
+    return name.capitalize() if name.islower() else name
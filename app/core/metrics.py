@@ -0,0 +1,159 @@
+import threading
+from collections import defaultdict
+
+from core.cache import tiered_caches
+
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+    """Counts of observations falling under each bucket's upper bound"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Add one observation"""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        """Yield the Prometheus samples of the histogram"""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket', dict(labels, le=f'{bound:g}'), cumulative
+        yield f'{name}_bucket', dict(labels, le='+Inf'), self.count
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+class RequestMetrics:
+    """Per-route request timings aggregated in process
+
+    Only running totals and histogram counts are kept, so memory use is
+    bounded by the number of routes rather than requests or queries.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything observed so far"""
+        with self._lock:
+            self.durations = defaultdict(lambda: Histogram(self.buckets))
+            self.responses = defaultdict(int)
+            self.db_seconds = defaultdict(float)
+            self.queries = defaultdict(int)
+            self.render_seconds = defaultdict(float)
+
+    def observe(self, route, method, status, duration, db_duration,
+                queries, render_duration):
+        """Record one finished request"""
+        key = (route, method)
+        with self._lock:
+            self.durations[key].observe(duration)
+            self.responses[key + (str(status),)] += 1
+            self.db_seconds[key] += db_duration
+            self.queries[key] += queries
+            self.render_seconds[key] += render_duration
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            self._write(lines, 'http_requests_total', 'counter',
+                        'Responses by route, method and status.', [
+                            ('http_requests_total', labels(key, 'status'),
+                             count)
+                            for key, count in sorted(self.responses.items())
+                        ])
+            self._write(lines, 'http_request_duration_seconds', 'histogram',
+                        'Time from request to response, per route.', [
+                            sample
+                            for key, histogram in sorted(
+                                self.durations.items()
+                            )
+                            for sample in histogram.samples(
+                                'http_request_duration_seconds',
+                                labels(key)
+                            )
+                        ])
+            for name, help_text, totals in [
+                ('http_request_db_seconds_total',
+                 'Time spent in database queries, per route.',
+                 self.db_seconds),
+                ('http_request_db_queries_total',
+                 'Database queries run, per route.', self.queries),
+                ('http_request_render_seconds_total',
+                 'Time spent rendering response bodies, per route.',
+                 self.render_seconds),
+            ]:
+                self._write(lines, name, 'counter', help_text, [
+                    (name, labels(key), total)
+                    for key, total in sorted(totals.items())
+                ])
+
+        caches = sorted(tiered_caches(), key=lambda cache: cache.prefix)
+        stats = [(cache.prefix, cache.stats()) for cache in caches]
+        self._write(lines, 'cache_hits_total', 'counter',
+                    'In-process cache hits by cache and tier.', [
+                        ('cache_hits_total', {'cache': prefix, 'tier': tier},
+                         cache_stats[stat])
+                        for prefix, cache_stats in stats
+                        for tier, stat in (('local', 'hits'),
+                                           ('shared', 'shared_hits'))
+                    ])
+        self._write(lines, 'cache_misses_total', 'counter',
+                    'In-process cache misses by cache.', [
+                        ('cache_misses_total', {'cache': prefix},
+                         cache_stats['misses'])
+                        for prefix, cache_stats in stats
+                    ])
+        self._write(lines, 'cache_entries', 'gauge',
+                    'Entries held by each in-process cache.', [
+                        ('cache_entries', {'cache': prefix},
+                         cache_stats['size'])
+                        for prefix, cache_stats in stats
+                    ])
+
+        return ''.join(f'{line}\n' for line in lines)
+
+    def _write(self, lines, name, metric_type, help_text, samples):
+        """Append a metric's HELP and TYPE lines and its samples"""
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for sample_name, sample_labels, value in samples:
+            label_text = ','.join(
+                f'{label}="{escape(label_value)}"'
+                for label, label_value in sample_labels.items()
+            )
+            lines.append(f'{sample_name}{{{label_text}}} {value!r}')
+
+
+def labels(key, *extra):
+    """Return the label dict of a (route, method[, extra...]) key"""
+    names = ('route', 'method') + extra
+
+    return dict(zip(names, key))
+
+
+def escape(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', r'\\').replace('"', r'\"') \
+        .replace('\n', r'\n')
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,116 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from core.metrics import request_metrics
+from core.slowqueries import explain, should_explain, slow_query_log
+
+
+class RequestTiming:
+    """Running totals of one request's database and rendering time
+
+    Statements taking at least SLOW_QUERY_MS milliseconds are also kept,
+    with a sampled plan, when that setting is given.
+    """
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.render_seconds = 0.0
+        self.slow_ms = getattr(settings, 'SLOW_QUERY_MS', None)
+        self.slow_queries = []
+
+    def time_query(self, execute, sql, params, many, context):
+        """Execution wrapper adding each query's time to the totals"""
+        start = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.db_seconds += duration
+            self.queries += 1
+
+        if self.slow_ms is not None and duration * 1000 >= self.slow_ms:
+            connection = context['connection']
+            self.slow_queries.append({
+                'time': timezone.now().isoformat(),
+                'duration_ms': round(duration * 1000, 3),
+                'sql': sql,
+                # Only the types: values include token keys and password
+                # hashes
+                'param_types': None if many or params is None else [
+                    type(param).__name__ for param in params
+                ],
+                'plan': explain(connection, sql, params)
+                if should_explain(connection, sql, many) else None,
+            })
+
+        return result
+
+
+class RequestTimingMiddleware:
+    """Time requests, their queries and rendering
+
+    The times are sent in a Server-Timing header and added to the
+    per-route metrics served at /metrics. Queries are only counted and
+    timed; just the slow ones are kept, in a bounded log.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request.timing = RequestTiming()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(timing.time_query)
+                )
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timing.db_seconds * 1000:.2f};'
+            f'desc="{timing.queries} queries"',
+            f'render;dur={timing.render_seconds * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ])
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unmatched'
+        request_metrics.observe(
+            route,
+            request.method,
+            response.status_code,
+            duration,
+            timing.db_seconds,
+            timing.queries,
+            timing.render_seconds
+        )
+        if timing.slow_queries:
+            user = getattr(request, 'user', None)
+            user_id = user.pk if user is not None and \
+                user.is_authenticated else None
+            for entry in timing.slow_queries:
+                slow_query_log.add(dict(
+                    entry,
+                    route=route,
+                    method=request.method,
+                    user_id=user_id
+                ))
+
+        return response
+
+    def process_template_response(self, request, response):
+        """Time rendering the response body, which happens after this"""
+        start = time.perf_counter()
+
+        def rendered(response):
+            request.timing.render_seconds += time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+
+        return response
@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models import Count, Min
+from django.db.models.functions import Upper
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Fold each user's tags and ingredients that differ only in case
+
+    Recipes linked to a duplicate are relinked to the oldest object with
+    that name before the duplicate is deleted.
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field_name in (('Tag', 'tags'),
+                                   ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, field_name).through
+        column = f'{model_name.lower()}_id'
+        named = model.objects.annotate(name_upper=Upper('name'))
+        groups = named.values('user_id', 'name_upper').annotate(
+            count=Count('id'),
+            keep_id=Min('id')
+        ).filter(count__gt=1)
+
+        for group in groups:
+            duplicate_ids = list(named.filter(
+                user_id=group['user_id'],
+                name_upper=group['name_upper']
+            ).exclude(id=group['keep_id']).values_list('id', flat=True))
+            linked = through.objects.filter(
+                **{column: group['keep_id']}
+            ).values('recipe_id')
+            for duplicate_id in duplicate_ids:
+                through.objects.filter(
+                    **{column: duplicate_id}
+                ).exclude(recipe_id__in=linked).update(
+                    **{column: group['keep_id']}
+                )
+            model.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_indexes'),
+    ]
+
+    # Without a reverse, unapplying raises IrreversibleError: the deleted
+    # duplicates and their links can't be restored
+    operations = [
+        migrations.RunPython(merge_duplicate_names),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_merge_duplicate_names'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX core_tag_user_name_uniq '
+            'ON core_tag (user_id, UPPER(name));',
+            'DROP INDEX core_tag_user_name_uniq;'
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX core_ingredient_user_name_uniq '
+            'ON core_ingredient (user_id, UPPER(name));',
+            'DROP INDEX core_ingredient_user_name_uniq;'
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.28 on 2026-10-18 04:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_change_versions(apps, schema_editor):
+    """Start a change counter for every existing user"""
+    User = apps.get_model('core', 'User')
+    ChangeVersion = apps.get_model('core', 'ChangeVersion')
+    ChangeVersion.objects.bulk_create([
+        ChangeVersion(user_id=user_id)
+        for user_id in User.objects.values_list('id', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_version', serialize=False, to='core.User')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            create_change_versions,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.28 on 2026-10-18 04:51
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_change_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            '''
+            UPDATE core_recipe SET search_vector =
+                setweight(to_tsvector('english', title), 'A') ||
+                setweight(to_tsvector('english', coalesce((
+                    SELECT string_agg(t.name, ' ')
+                    FROM core_tag t
+                    INNER JOIN core_recipe_tags rt ON rt.tag_id = t.id
+                    WHERE rt.recipe_id = core_recipe.id
+                ), '')), 'B') ||
+                setweight(to_tsvector('english', coalesce((
+                    SELECT string_agg(i.name, ' ')
+                    FROM core_ingredient i
+                    INNER JOIN core_recipe_ingredients ri
+                        ON ri.ingredient_id = i.id
+                    WHERE ri.recipe_id = core_recipe.id
+                ), '')), 'B')
+            ''',
+            migrations.RunSQL.noop
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fastupdate=False, fields=['search_vector'], name='core_recipe_search_idx'),
+        ),
+    ]
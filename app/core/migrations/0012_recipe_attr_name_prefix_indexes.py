@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX core_tag_user_name_prefix_idx '
+            'ON core_tag (user_id, (UPPER(name) COLLATE "C"));',
+            'DROP INDEX core_tag_user_name_prefix_idx;'
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_ingredient_user_name_prefix_idx '
+            'ON core_ingredient (user_id, (UPPER(name) COLLATE "C"));',
+            'DROP INDEX core_ingredient_user_name_prefix_idx;'
+        ),
+    ]
@@ -1,9 +1,38 @@
-from django.db import models
+from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+    SearchVectorField
+from django.db import IntegrityError, connections, models, router, \
+    transaction
+from django.db.models.functions import Coalesce, Upper
 from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
 import os
+import threading
 import uuid
+from contextlib import contextmanager
+
+# Text search configuration used to index and query recipes
+SEARCH_CONFIG = 'english'
+
+UPDATE_SEARCH_VECTOR_SQL = '''
+UPDATE core_recipe SET search_vector =
+    setweight(to_tsvector(%s::regconfig, title), 'A') ||
+    setweight(to_tsvector(%s::regconfig, coalesce((
+        SELECT string_agg(t.name, ' ')
+        FROM core_tag t
+        INNER JOIN core_recipe_tags rt ON rt.tag_id = t.id
+        WHERE rt.recipe_id = core_recipe.id
+    ), '')), 'B') ||
+    setweight(to_tsvector(%s::regconfig, coalesce((
+        SELECT string_agg(i.name, ' ')
+        FROM core_ingredient i
+        INNER JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id
+        WHERE ri.recipe_id = core_recipe.id
+    ), '')), 'B')
+WHERE id IN ({ids})
+'''
 
 
 def recipe_image_file_path(instance, filename):
@@ -14,7 +43,37 @@ def recipe_image_file_path(instance, filename):
     return os.path.join('uploads/recipe/', filename)
 
 
-class UserManager(BaseUserManager):
+_deleting = threading.local()
+
+
+@contextmanager
+def deleting_users(user_ids):
+    """Mark users as being deleted in this thread for the block"""
+    previous = getattr(_deleting, 'user_ids', frozenset())
+    _deleting.user_ids = previous | set(user_ids)
+    try:
+        yield
+    finally:
+        _deleting.user_ids = previous
+
+
+def owner_deleted(user_id):
+    """Return whether the user is being deleted along with their data
+
+    Signal receivers use this to skip per-object bookkeeping for rows that
+    are going away with their owner.
+    """
+    return user_id in getattr(_deleting, 'user_ids', ())
+
+
+class UserQuerySet(models.QuerySet):
+    def delete(self):
+        """Delete the users, with their data in bulk"""
+        with deleting_users(self.values_list('pk', flat=True)):
+            return super().delete()
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         """Creates and saves a new user with email"""
         if not email:
@@ -46,6 +105,128 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    def delete(self, *args, **kwargs):
+        """Delete the user, with their data in bulk"""
+        with deleting_users([self.pk]):
+            return super().delete(*args, **kwargs)
+
+
+class BytewiseUpper(models.Func):
+    """Upper-cased text compared byte-wise, as the prefix indexes store it
+
+    The "C" collation lets a btree index answer LIKE 'prefix%' and return
+    rows in order, so autocomplete stops after its LIMIT.
+    """
+    function = 'UPPER'
+    template = '(%(function)s(%(expressions)s) COLLATE "C")'
+
+
+class RecipeAttrQuerySet(models.QuerySet):
+    """Queries on objects users name for their recipes"""
+
+    def recipe_links(self):
+        """Return the recipe links of the outer query's object"""
+        return self._recipe_relation().through.objects.filter(**{
+            self._link_field_name(): models.OuterRef('pk')
+        })
+
+    def _recipe_relation(self):
+        """Return the relation from this model to recipes"""
+        return self.model._meta.get_field('recipe')
+
+    def _link_field_name(self):
+        """Return the through table's field pointing at this model"""
+        return self._recipe_relation().field.m2m_reverse_field_name()
+
+    def assigned(self):
+        """Return only objects linked to at least one recipe
+
+        Each row is checked with an EXISTS on the through table, so rows
+        aren't multiplied by their links and need no DISTINCT.
+        """
+        return self.annotate(
+            is_assigned=models.Exists(self.recipe_links())
+        ).filter(is_assigned=True)
+
+    def with_recipe_count(self):
+        """Annotate each object with the number of recipes it's linked to
+
+        The count is a correlated subquery, so only the rows returned are
+        counted rather than every link being grouped.
+        """
+        counts = self.recipe_links().order_by().values(
+            self._link_field_name()
+        ).annotate(
+            count=models.Count(self._recipe_relation().field.m2m_field_name())
+        ).values('count')
+
+        return self.annotate(
+            recipe_count=Coalesce(
+                models.Subquery(counts, output_field=models.IntegerField()),
+                0
+            )
+        )
+
+
+class RecipeAttrManager(models.Manager.from_queryset(RecipeAttrQuerySet)):
+    """Manager for objects users name for their recipes"""
+
+    def autocomplete(self, user, prefix, limit):
+        """Return up to limit of the user's objects starting with prefix
+
+        Matching ignores case and results are ordered by name.
+        """
+        return self.annotate(name_key=BytewiseUpper('name')).filter(
+            user=user,
+            name_key__startswith=prefix.upper()
+        ).order_by('name_key')[:limit]
+
+    def get_or_create_many(self, user, names):
+        """Return an object per distinct name, creating missing ones in bulk
+
+        Names match case-insensitively; a new object keeps the first
+        spelling of its name given.
+        """
+        wanted = {}
+        for name in names:
+            wanted.setdefault(name.upper(), name)
+
+        found = {
+            obj.name.upper(): obj
+            for obj in self.annotate(name_upper=Upper('name')).filter(
+                user=user,
+                name_upper__in=list(wanted)
+            )
+        }
+        missing = [name for key, name in wanted.items() if key not in found]
+        if missing:
+            try:
+                with transaction.atomic():
+                    created = self.bulk_create(
+                        [self.model(user=user, name=name) for name in missing]
+                    )
+            except IntegrityError:
+                # Another request created some of these names first
+                created = [
+                    self._get_or_create_one(user, name) for name in missing
+                ]
+            for obj in created:
+                found.setdefault(obj.name.upper(), obj)
+            ChangeVersion.objects.filter(user=user).bump()
+
+        return [
+            found.get(key) or self._get_or_create_one(user, name)
+            for key, name in wanted.items()
+        ]
+
+    def _get_or_create_one(self, user, name):
+        """Return the user's object named name in any case, creating it"""
+        obj = self.filter(user=user, name__iexact=name).first()
+        if obj is None:
+            obj = self.create(user=user, name=name)
+
+        return obj
+
 
 class Tag(models.Model):
     """Tags for a recipe"""
@@ -55,6 +236,16 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = RecipeAttrManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='core_tag_user_name_idx'
+            )
+        ]
+
     def __str__(self):
         return self.name
 
@@ -67,10 +258,46 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = RecipeAttrManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='core_ingredient_user_name_idx'
+            )
+        ]
+
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Queries on recipes"""
+
+    def search(self, text):
+        """Return recipes matching text, best matches first"""
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+
+        return self.filter(search_vector=query).annotate(
+            rank=SearchRank(models.F('search_vector'), query)
+        ).order_by('-rank', '-id')
+
+    def update_search_vector(self):
+        """Recompute the stored search vector of the matched recipes
+
+        Titles are weighted above the names of linked tags and
+        ingredients, so they rank first.
+        """
+        ids_sql, params = self.values('pk').query.sql_with_params()
+        db = self._db or router.db_for_write(self.model, **self._hints)
+        with connections[db].cursor() as cursor:
+            cursor.execute(
+                UPDATE_SEARCH_VECTOR_SQL.format(ids=ids_sql),
+                [SEARCH_CONFIG] * 3 + list(params)
+            )
+
+
 class Recipe(models.Model):
     """Model for main recipe model"""
     user = models.ForeignKey(
@@ -82,8 +309,60 @@ class Recipe(models.Model):
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_variants = JSONField(default=dict, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'id'],
+                name='core_recipe_user_id_idx'
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='core_recipe_search_idx',
+                fastupdate=False
+            )
+        ]
 
     def __str__(self):
         return self.title
+
+
+class ChangeVersionQuerySet(models.QuerySet):
+    """Queries on per-user change counters"""
+
+    def bump(self):
+        """Increment the counters matched by this queryset"""
+        return self.update(version=models.F('version') + 1)
+
+    def get_version(self, user_id):
+        """Return a user's counter, starting one if they have none"""
+        version = self.filter(user_id=user_id).values_list(
+            'version',
+            flat=True
+        ).first()
+        if version is None:
+            version = self.get_or_create(user_id=user_id)[0].version
+
+        return version
+
+
+class ChangeVersion(models.Model):
+    """Counter increased by every write to a user's recipe data"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='change_version'
+    )
+    version = models.BigIntegerField(default=0)
+
+    objects = ChangeVersionQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.user_id}: {self.version}'
@@ -0,0 +1,117 @@
+import random
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+from core.cache import TieredCache
+
+# Users who wrote recently, who read from the primary until the entry expires
+primary_pins = TieredCache(
+    'primary-pin',
+    max_size=getattr(settings, 'REPLICA_PIN_CACHE_SIZE', 10000),
+    timeout=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+    cache_alias=getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', None)
+)
+
+_state = threading.local()
+
+
+def replica_weights():
+    """Return the {alias: weight} of the configured read replicas"""
+    return getattr(settings, 'DATABASE_REPLICAS', {})
+
+
+def choose_replica():
+    """Return a replica alias picked by weight, or the primary if none"""
+    weights = replica_weights()
+    if not weights:
+        return DEFAULT_DB_ALIAS
+
+    return random.choices(list(weights), list(weights.values()))[0]
+
+
+def check_pin_cache():
+    """Raise ImproperlyConfigured if replicas have no shared pin cache
+
+    Pins kept only in one process would let the user's next request,
+    served by another worker, read a replica that hasn't caught up.
+    """
+    if replica_weights() and primary_pins.cache_alias is None:
+        raise ImproperlyConfigured(
+            'Set REPLICA_PIN_CACHE_ALIAS to a cache every process shares '
+            'when DATABASE_REPLICAS is used'
+        )
+
+
+def set_replica_reads(enabled):
+    """Send this thread's reads to a replica, or back to the primary
+
+    A replica is chosen once, so reads in one request see one snapshot.
+    """
+    _state.read_alias = choose_replica() if enabled else None
+
+
+def pin_to_primary(user_id):
+    """Read the user's data from the primary until replicas catch up"""
+    primary_pins.set(str(user_id), True)
+
+
+def pinned_to_primary(user_id):
+    """Return whether the user wrote too recently to read from a replica"""
+    return primary_pins.get(str(user_id), False)
+
+
+class ReplicaRouter:
+    """Route reads to the replicas where a view allows it
+
+    Everything else, including every write and migration, goes to the
+    primary. Views opt in with ReplicaReadMixin.
+    """
+
+    def db_for_read(self, model, **hints):
+        return getattr(_state, 'read_alias', None) or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_weights()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from a replica, unless the user just wrote
+
+    A successful unsafe request pins its user to the primary for
+    REPLICA_PIN_SECONDS, so they read their own writes.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            set_replica_reads(False)
+
+    def initial(self, request, *args, **kwargs):
+        """Switch reads to a replica once the user is known"""
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and \
+                not pinned_to_primary(request.user.pk):
+            set_replica_reads(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and \
+                response.status_code < 400 and \
+                request.user.is_authenticated:
+            pin_to_primary(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
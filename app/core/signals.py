@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+    pre_delete
+from django.dispatch import receiver
+
+from core.models import ChangeVersion, Ingredient, Recipe, Tag, \
+    owner_deleted
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_change_version(sender, instance, created, **kwargs):
+    """Start a new user's change counter"""
+    if created:
+        ChangeVersion.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def bump_owner_version(sender, instance, **kwargs):
+    """Mark the owner's data as changed after a save or delete"""
+    if not owner_deleted(instance.user_id):
+        ChangeVersion.objects.filter(user_id=instance.user_id).bump()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_linked_version(sender, instance, action, **kwargs):
+    """Mark the owner's data as changed after recipe links change
+
+    instance is the recipe, or the tag or ingredient for changes made
+    from the reverse side; either way it belongs to the same user.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        ChangeVersion.objects.filter(user_id=instance.user_id).bump()
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, update_fields, **kwargs):
+    """Reindex a recipe whose title may have changed"""
+    if update_fields is None or 'title' in update_fields:
+        Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_named_search_vectors(sender, instance, created, **kwargs):
+    """Reindex the recipes linked to a tag or ingredient after a rename"""
+    if not created:
+        instance.recipe_set.all().update_search_vector()
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_linked_recipes(sender, instance, **kwargs):
+    """Note the recipes to reindex once a tag or ingredient is gone"""
+    if owner_deleted(instance.user_id):
+        return
+
+    instance._linked_recipe_ids = list(
+        instance.recipe_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def update_unlinked_search_vectors(sender, instance, **kwargs):
+    """Reindex the recipes a deleted tag or ingredient was linked to"""
+    linked = getattr(instance, '_linked_recipe_ids', [])
+    if linked:
+        Recipe.objects.filter(pk__in=linked).update_search_vector()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_linked_search_vectors(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    """Reindex the recipes whose tags or ingredients changed"""
+    if action == 'pre_clear' and reverse:
+        remember_linked_recipes(sender, instance)
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif action == 'post_clear':
+        recipes = Recipe.objects.filter(pk__in=instance._linked_recipe_ids)
+    else:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    recipes.update_search_vector()
+
+
+@receiver(request_started)
+def check_persistent_connections(sender, **kwargs):
+    """Drop open connections that stopped working, if DB_HEALTH_CHECKS"""
+    if not getattr(settings, 'DB_HEALTH_CHECKS', False):
+        return
+
+    for connection in connections.all():
+        if connection.connection is not None and \
+                not connection.is_usable():
+            connection.close()
@@ -0,0 +1,74 @@
+import random
+import re
+import threading
+from collections import deque
+
+from django.conf import settings
+
+EXPLAIN_PREFIX = 'EXPLAIN (ANALYZE, BUFFERS) '
+
+# Quoted literals in a plan, which show the statement's parameter values
+PLAN_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+class SlowQueryLog:
+    """The most recent slow statements, in a ring buffer of fixed size"""
+
+    def __init__(self, size):
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        """Record a slow statement, dropping the oldest if full"""
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self):
+        """Return the recorded statements, newest first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        """Forget every recorded statement"""
+        with self._lock:
+            self._entries.clear()
+
+
+def should_explain(connection, sql, many):
+    """Return whether to sample a plan for a slow statement
+
+    Only single SELECTs are explained, since EXPLAIN ANALYZE runs the
+    statement again.
+    """
+    rate = getattr(settings, 'SLOW_QUERY_EXPLAIN_RATE', 0.1)
+    return connection.vendor == 'postgresql' and not many and \
+        sql.lstrip()[:6].upper() == 'SELECT' and random.random() < rate
+
+
+def explain(connection, sql, params):
+    """Return the EXPLAIN ANALYZE output for sql, or None if it fails
+
+    Quoted values are masked, as they may be secrets. The raw cursor
+    skips the connection's execute wrappers, and a savepoint keeps a
+    failure from breaking an open transaction.
+    """
+    savepoint = connection.in_atomic_block
+    with connection.connection.cursor() as cursor:
+        if savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(EXPLAIN_PREFIX + sql, params)
+            plan = PLAN_LITERAL.sub("'?'", '\n'.join(
+                row[0] for row in cursor.fetchall()
+            ))
+        except connection.Database.Error:
+            plan = None
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+        if savepoint:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+
+    return plan
+
+
+slow_query_log = SlowQueryLog(getattr(settings, 'SLOW_QUERY_LOG_SIZE', 100))
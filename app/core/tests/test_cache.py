@@ -0,0 +1,103 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import LRUCache, TieredCache, pickled_size
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def test_least_recently_used_evicted(self):
+        """Test the oldest unused entry is dropped when the cache is full"""
+        cache = LRUCache(max_size=2, timeout=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('core.cache.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        """Test entries are not returned once their timeout passes"""
+        mock_monotonic.return_value = 100
+        cache = LRUCache(max_size=2, timeout=60)
+        cache.set('a', 1)
+
+        mock_monotonic.return_value = 161
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_hits_and_misses_counted(self):
+        """Test lookups are counted"""
+        cache = LRUCache(max_size=2, timeout=60)
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('b')
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_bounded_by_bytes(self):
+        """Test entries are evicted to keep their total size in bounds"""
+        value = 'x' * 100
+        size = pickled_size(value)
+        cache = LRUCache(max_size=10, timeout=60, max_bytes=size * 2)
+        cache.set('a', value)
+        cache.set('b', value)
+        cache.set('c', value)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), value)
+        self.assertEqual(cache.stats()['bytes'], size * 2)
+
+    def test_value_over_byte_limit_not_kept(self):
+        """Test a value bigger than the whole cache isn't stored"""
+        cache = LRUCache(max_size=10, timeout=60, max_bytes=50)
+        cache.set('a', 'x')
+        cache.set('b', 'x' * 100)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'x')
+        cache.delete('a')
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TieredCacheTests(SimpleTestCase):
+
+    def test_shared_tier_fills_local(self):
+        """Test a value set by another process is found in the shared tier"""
+        writer = TieredCache('test', max_size=10, timeout=60,
+                             cache_alias='default')
+        reader = TieredCache('test', max_size=10, timeout=60,
+                             cache_alias='default')
+        writer.set('a', 1)
+
+        self.assertEqual(reader.get('a'), 1)
+        self.assertEqual(reader.get('a'), 1)
+        stats = reader.stats()
+        self.assertEqual(stats['shared_hits'], 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 0)
+        writer.delete('a')
+
+    def test_delete_clears_both_tiers(self):
+        """Test deleting a key removes it from the shared tier too"""
+        cache = TieredCache('test', max_size=10, timeout=60,
+                            cache_alias='default')
+        cache.set('a', 1)
+        cache.delete('a')
+
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.shared.get(cache.make_key('a')))
@@ -1,7 +1,22 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
 from django.db.utils import OperationalError
 from django.test import TestCase
+from django.urls import get_resolver, reverse
+from rest_framework.test import APIClient
+
+from core.management.commands.import_recipes import \
+    Command as ImportCommand
+from core.models import ChangeVersion, Recipe, Tag
 
 
 class CommandTests(TestCase):
@@ -19,3 +34,284 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+    def test_benchmark_search(self):
+        """Test the search benchmark times both queries and cleans up"""
+        out = StringIO()
+        call_command('benchmark_search', recipes=2000, runs=1, stdout=out)
+
+        self.assertIn('"saffron" matches 2 recipes', out.getvalue())
+        self.assertIn('search: median', out.getvalue())
+        self.assertIn('icontains: median', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_benchmark_assigned_only(self):
+        """Test the assigned_only benchmark times each plan and cleans up"""
+        out = StringIO()
+        call_command(
+            'benchmark_assigned_only',
+            recipes=200,
+            ingredients=50,
+            runs=1,
+            stdout=out
+        )
+
+        for label in ['join + distinct', 'exists', 'exists + counts']:
+            self.assertIn(f'{label}: median', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_benchmark_fast_lists(self):
+        """Test the fast list benchmark finds both paths agree"""
+        out = StringIO()
+        err = StringIO()
+        call_command(
+            'benchmark_fast_lists',
+            recipes=50,
+            ingredients=30,
+            page_size=20,
+            runs=1,
+            stdout=out,
+            stderr=err
+        )
+
+        self.assertIn('fast: median', out.getvalue())
+        self.assertIn('speedup', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+        self.assertFalse(Recipe.objects.exists())
+
+
+class ImportRecipesTests(TestCase):
+    """Test importing recipes from NDJSON and CSV files"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+
+    def write(self, content, suffix):
+        """Return the path of a temporary file holding content"""
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8', newline='') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+
+        return path
+
+    def import_recipes(self, content, suffix='.ndjson', **options):
+        """Run import_recipes on content, returning its output"""
+        out = StringIO()
+        call_command(
+            'import_recipes',
+            self.write(content, suffix),
+            user=self.user.email,
+            stdout=out,
+            **options
+        )
+
+        return out.getvalue()
+
+    def test_import_ndjson(self):
+        """Test recipes are imported with tags and ingredients by name"""
+        version = ChangeVersion.objects.get_version(self.user.id)
+        lines = [
+            {'title': 'Soup', 'time_minutes': 10, 'price': '5.50',
+             'tags': ['vegan', 'Quick'], 'ingredients': ['Salt']},
+            {'title': 'Salad', 'time_minutes': 5, 'price': 3,
+             'link': 'https://example.com', 'tags': ['Quick', 'quick'],
+             'ingredients': []},
+            {'title': 'Stew', 'time_minutes': 60, 'price': '12'},
+        ]
+        out = self.import_recipes(
+            '\n'.join(json.dumps(line) for line in lines),
+            batch_size=2
+        )
+
+        self.assertIn('Imported 2 recipes', out)
+        self.assertIn('Imported 3 recipes in', out)
+        soup = Recipe.objects.get(title='Soup')
+        self.assertEqual(soup.price, Decimal('5.50'))
+        self.assertEqual(
+            sorted(soup.tags.values_list('name', flat=True)),
+            ['Quick', 'Vegan']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        salad = Recipe.objects.get(title='Salad')
+        self.assertEqual(salad.link, 'https://example.com')
+        self.assertEqual(salad.tags.count(), 1)
+        self.assertEqual(Recipe.objects.get(title='Stew').link, '')
+        self.assertEqual(
+            list(Recipe.objects.search('salt').values_list('title',
+                                                           flat=True)),
+            ['Soup']
+        )
+        self.assertGreater(
+            ChangeVersion.objects.get_version(self.user.id),
+            version
+        )
+
+    def test_import_csv(self):
+        """Test importing a CSV export with names in JSON arrays"""
+        self.import_recipes(
+            'id,title,time_minutes,price,link,tags,ingredients\r\n'
+            '7,"Soup, ""hot""",10,5.00,,"[""Vegan"",""Quick""]",'
+            '"[""Salt""]"\r\n'
+            '8,Pie,20,4.00,,[],\r\n',
+            suffix='.csv'
+        )
+
+        soup = Recipe.objects.get(title='Soup, "hot"')
+        self.assertEqual(soup.tags.count(), 2)
+        self.assertEqual(soup.ingredients.get().name, 'Salt')
+        self.assertEqual(Recipe.objects.get(title='Pie').tags.count(), 0)
+
+    def test_import_csv_bad_names(self):
+        """Test a CSV names column that isn't a JSON array is rejected"""
+        content = (
+            'title,time_minutes,price,tags\r\n'
+            'Soup,10,5.00,Vegan;Quick\r\n'
+        )
+
+        with self.assertRaisesMessage(CommandError, 'Line 2: tags'):
+            self.import_recipes(content, suffix='.csv')
+
+    def test_import_invalid_record(self):
+        """Test an invalid record aborts the whole import"""
+        content = '\n'.join([
+            json.dumps({'title': 'Soup', 'time_minutes': 10, 'price': 5}),
+            json.dumps({'title': 'Pie', 'time_minutes': 'soon', 'price': 5}),
+        ])
+
+        with self.assertRaisesMessage(CommandError, 'Line 2: time_minutes'):
+            self.import_recipes(content, batch_size=1)
+
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_import_without_copy(self):
+        """Test other backends load the rows with bulk_create"""
+        content = json.dumps({'title': 'Soup', 'time_minutes': 10,
+                              'price': 5, 'tags': ['Vegan']})
+
+        with patch.object(ImportCommand, 'can_copy', return_value=False):
+            self.import_recipes(content)
+
+        self.assertEqual(Recipe.objects.get().tags.get(), self.vegan)
+
+    def test_export_round_trip(self):
+        """Test a user's export can be imported for another user"""
+        recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                       time_minutes=10, price=5)
+        recipe.tags.add(self.vegan)
+        awkward = Tag.objects.create(user=self.user, name='Salt; "pepper", ok')
+        recipe.tags.add(awkward)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for export_format in ('ndjson', 'csv'):
+            res = client.get(
+                reverse('recipe:recipe-export'),
+                {'format': export_format}
+            )
+            self.user = get_user_model().objects.create_user(
+                f'{export_format}@testing.com'
+            )
+            self.import_recipes(
+                b''.join(res.streaming_content).decode(),
+                suffix=f'.{export_format}'
+            )
+
+            imported = Recipe.objects.get(user=self.user)
+            self.assertEqual(
+                (imported.title, imported.time_minutes, imported.price),
+                ('Soup', 10, Decimal('5.00'))
+            )
+            self.assertEqual(
+                sorted(imported.tags.values_list('name', flat=True)),
+                ['Salt; "pepper", ok', 'Vegan']
+            )
+
+
+class BenchmarkApiTests(TestCase):
+    """Test seeding benchmark data and timing the API against it"""
+
+    def seed(self, **options):
+        """Run seed_benchmark at a small scale"""
+        options = dict({'users': 2, 'recipes': 30, 'tags': 6,
+                        'ingredients': 20}, **options)
+        call_command('seed_benchmark', stdout=StringIO(), **options)
+
+    def test_seed_benchmark(self):
+        """Test users are seeded with popular tags on more recipes"""
+        self.seed()
+
+        user = get_user_model().objects.get(email='bench0@example.com')
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 30)
+        counts = list(Tag.objects.filter(user=user).with_recipe_count()
+                      .order_by('-recipe_count')
+                      .values_list('recipe_count', flat=True))
+        self.assertEqual(len(counts), 6)
+        self.assertGreater(counts[0], counts[-1])
+        self.assertFalse(
+            Recipe.objects.filter(search_vector__isnull=True).exists()
+        )
+
+    def test_seed_benchmark_needs_clear(self):
+        """Test seeding again is refused unless asked to clear"""
+        self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.seed(clear=True, users=1)
+        self.assertEqual(
+            get_user_model().objects.filter(email__startswith='bench')
+            .count(),
+            1
+        )
+
+    def test_benchmark_api_covers_every_route(self):
+        """Test each recipe and user route is timed and writes roll back"""
+        self.seed()
+        recipes = Recipe.objects.count()
+        handle, output = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, output)
+
+        out = StringIO()
+        call_command('benchmark_api', runs=2, output=output,
+                     compare=output, stdout=out)
+
+        with open(output) as file:
+            routes = json.load(file)['routes']
+        names = {name.split()[1] for name in routes}
+        for namespace, urlconf in [('recipe', 'recipe.urls'),
+                                   ('user', 'user.urls')]:
+            for pattern in get_resolver(urlconf).reverse_dict:
+                if isinstance(pattern, str):
+                    self.assertIn(f'{namespace}:{pattern}', names)
+        for name, result in routes.items():
+            self.assertLess(max(result['statuses']), 400, name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertIn('Compared with', out.getvalue())
+        self.assertEqual(Recipe.objects.count(), recipes)
+
+    def test_benchmark_wsgi(self):
+        """Test requests through the WSGI handler are timed and compared"""
+        self.seed()
+        handle, output = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, output)
+        # Ending a request would otherwise close the test's connection
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+        out = StringIO()
+        call_command('benchmark_wsgi', requests=7, memory_requests=2,
+                     output=output, compare=output, stdout=out)
+
+        with open(output) as file:
+            result = json.load(file)['result']
+        self.assertEqual(result['requests'], 7)
+        self.assertEqual(result['statuses'], [200])
+        self.assertGreater(result['peak_kb_per_request'], 0)
+        self.assertIn('requests_per_second', out.getvalue())
@@ -0,0 +1,122 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.metrics import Histogram, RequestMetrics, request_metrics
+from recipe.cache import response_cache
+
+TAGS_URL = reverse('recipe:tag-list')
+METRICS_URL = reverse('metrics')
+
+
+class MetricsTests(TestCase):
+    """Test request timing headers and the Prometheus metrics"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        request_metrics.reset()
+        response_cache.clear()
+
+    def test_server_timing_header(self):
+        """Test responses say how long queries, rendering and all took"""
+        with self.assertNumQueries(2):
+            res = self.client.get(TAGS_URL)
+
+        self.assertRegex(
+            res['Server-Timing'],
+            r'^db;dur=[0-9.]+;desc="2 queries", render;dur=[0-9.]+, '
+            r'total;dur=[0-9.]+$'
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_per_route(self):
+        """Test requests are counted and timed per route"""
+        self.client.get(TAGS_URL)
+        self.client.get(TAGS_URL)
+        self.client.get('/nowhere/')
+
+        res = self.client.get(METRICS_URL,
+                              HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(res['Content-Type'],
+                         'text/plain; version=0.0.4; charset=utf-8')
+        content = res.content.decode()
+        self.assertIn(
+            'http_requests_total{route="recipe:tag-list",method="GET",'
+            'status="200"} 2',
+            content
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{route="recipe:tag-list",'
+            'method="GET"} 2',
+            content
+        )
+        self.assertRegex(
+            content,
+            r'http_request_db_queries_total\{route="recipe:tag-list",'
+            r'method="GET"\} [1-9]'
+        )
+        self.assertIn('route="unmatched",method="GET",status="404"', content)
+        self.assertIn('cache_entries{cache="recipe-response"}', content)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """Test a configured token is required to read the metrics"""
+        denied = self.client.get(METRICS_URL)
+        allowed = self.client.get(METRICS_URL,
+                                  HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(denied.status_code, 401)
+        self.assertEqual(allowed.status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_closed_without_token(self):
+        """Test only staff read the metrics when no token is configured"""
+        staff = get_user_model().objects.create_user(
+            'staff@testing.com',
+            'TestPasswd123@',
+            is_staff=True
+        )
+        denied = self.client.get(METRICS_URL)
+        self.client.force_login(self.user)
+        not_staff = self.client.get(METRICS_URL)
+        self.client.force_login(staff)
+        allowed = self.client.get(METRICS_URL)
+
+        self.assertEqual(denied.status_code, 403)
+        self.assertEqual(not_staff.status_code, 403)
+        self.assertEqual(allowed.status_code, 200)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test each bucket counts every observation up to its bound"""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3):
+            histogram.observe(value)
+
+        samples = list(histogram.samples('latency', {}))
+
+        self.assertEqual(
+            [(labels.get('le'), value) for _, labels, value in samples[:3]],
+            [('0.1', 1), ('1', 3), ('+Inf', 4)]
+        )
+        self.assertEqual(samples[-1], ('latency_count', {}, 4))
+
+    def test_label_values_escaped(self):
+        """Test label values can't break the exposition format"""
+        metrics = RequestMetrics()
+        metrics.observe('a"b\\c', 'GET', 200, 0.1, 0.0, 0, 0.0)
+
+        line = next(
+            line for line in metrics.render().splitlines()
+            if line.startswith('http_requests_total{')
+        )
+
+        self.assertTrue(re.search(r'route="a\\"b\\\\c"', line))
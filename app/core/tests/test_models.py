@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from unittest.mock import patch
 
@@ -82,3 +84,34 @@ class ModelTests(TestCase):
 
         exp_path = f'uploads/recipe/{uuid}.jpg'
         self.assertEqual(file_path, exp_path)
+
+    def test_user_deleted_in_bulk(self):
+        """Test deleting a user doesn't run queries per recipe or tag"""
+        def user_with_data(email, count):
+            user = sample_user(email=email)
+            for i in range(count):
+                recipe = models.Recipe.objects.create(
+                    user=user,
+                    title=f'Recipe {i}',
+                    time_minutes=5,
+                    price=1
+                )
+                recipe.tags.add(
+                    models.Tag.objects.create(user=user, name=f'Tag {i}')
+                )
+                recipe.ingredients.add(models.Ingredient.objects.create(
+                    user=user,
+                    name=f'Ingredient {i}'
+                ))
+            return user
+
+        small = user_with_data('small@testing.com', 1)
+        large = user_with_data('large@testing.com', 10)
+
+        with CaptureQueriesContext(connection) as one:
+            small.delete()
+        with CaptureQueriesContext(connection) as many:
+            large.delete()
+
+        self.assertEqual(len(many), len(one))
+        self.assertFalse(models.Recipe.objects.exists())
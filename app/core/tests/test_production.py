@@ -0,0 +1,70 @@
+import importlib
+import os
+import sys
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.signals import check_persistent_connections
+
+
+PRODUCTION_ENVIRON = {
+    'DJANGO_SECRET_KEY': 'secret',
+    'METRICS_TOKEN': 'metrics-secret',
+    'ALLOWED_HOSTS': 'a,b',
+}
+
+
+def import_production_settings(environ):
+    """Import the production settings afresh under environ"""
+    with patch.dict(os.environ, environ), patch.dict(sys.modules):
+        sys.modules.pop('app.settings_production', None)
+        return importlib.import_module('app.settings_production')
+
+
+class ProductionSettingsTests(TestCase):
+    """Test the production settings and the checks they turn on"""
+
+    def test_production_settings(self):
+        """Test production runs without DEBUG, keeping connections open"""
+        production = import_production_settings(PRODUCTION_ENVIRON)
+
+        self.assertFalse(production.DEBUG)
+        self.assertEqual(production.METRICS_TOKEN, 'metrics-secret')
+        self.assertEqual(production.ALLOWED_HOSTS, ['a', 'b'])
+        self.assertEqual(production.DATABASES['default']['CONN_MAX_AGE'], 60)
+        self.assertTrue(production.DB_HEALTH_CHECKS)
+        self.assertTrue(production.RECIPE_FAST_LISTS)
+        self.assertEqual(
+            production.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'],
+            ('rest_framework.renderers.JSONRenderer',)
+        )
+        self.assertFalse(production.TEMPLATES[0]['APP_DIRS'])
+
+    @patch.dict(os.environ)
+    def test_production_needs_metrics_token(self):
+        """Test production won't start with /metrics left unprotected"""
+        environ = dict(PRODUCTION_ENVIRON)
+        del environ['METRICS_TOKEN']
+        os.environ.pop('METRICS_TOKEN', None)
+
+        with self.assertRaises(KeyError):
+            import_production_settings(environ)
+
+    @override_settings(DB_HEALTH_CHECKS=True)
+    def test_broken_connections_closed(self):
+        """Test a connection that stopped working is dropped"""
+        connection.ensure_connection()
+        with patch.object(connection, 'is_usable', return_value=False), \
+                patch.object(connection, 'close') as close:
+            check_persistent_connections(sender=None)
+
+        close.assert_called_once_with()
+
+    def test_health_checks_off(self):
+        """Test connections aren't checked unless asked to"""
+        with patch.object(connection, 'is_usable') as is_usable:
+            check_persistent_connections(sender=None)
+
+        is_usable.assert_not_called()
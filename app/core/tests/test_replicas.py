@@ -0,0 +1,193 @@
+import random
+from collections import Counter
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.cache import TieredCache
+from core.models import Recipe
+from core.replicas import ReplicaRouter, check_pin_cache, choose_replica, \
+    pin_to_primary, primary_pins, set_replica_reads
+from recipe.cache import response_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+
+# A second connection to the test database. It can't see rows written in
+# a test's open transaction, so it behaves like a lagging replica.
+REPLICA = 'replica_test'
+
+
+def recipe_titles(res):
+    return [recipe['title'] for recipe in res.data['results']]
+
+
+@override_settings(DATABASE_REPLICAS={REPLICA: 1})
+class ReplicaReadTests(TestCase):
+    """Test safe requests read from a replica unless the user just wrote"""
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        connections.databases[REPLICA] = dict(
+            connections.databases[DEFAULT_DB_ALIAS],
+            TEST={'MIRROR': DEFAULT_DB_ALIAS}
+        )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        delattr(connections._connections, REPLICA)
+        del connections.databases[REPLICA]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        Recipe.objects.create(
+            user=self.user,
+            title='Pancakes',
+            time_minutes=20,
+            price=4.00
+        )
+        primary_pins.clear()
+        response_cache.clear()
+
+    def test_reads_from_replica(self):
+        """Test list requests are served by the replica"""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(recipe_titles(res), [])
+
+    def test_reads_own_writes(self):
+        """Test a user reads from the primary right after writing"""
+        self.client.post(RECIPES_URL, {
+            'title': 'Waffles',
+            'time_minutes': 15,
+            'price': '3.00'
+        })
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(sorted(recipe_titles(res)), ['Pancakes', 'Waffles'])
+
+    def test_failed_write_not_pinned(self):
+        """Test a rejected write leaves the user on the replica"""
+        self.client.post(RECIPES_URL, {'title': 'No time or price'})
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(recipe_titles(res), [])
+
+    def test_pin_per_user(self):
+        """Test one user's write doesn't pin other users"""
+        other = get_user_model().objects.create_user(
+            'other@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.patch(ME_URL, {'name': 'New name'})
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(recipe_titles(res), [])
+
+    def test_writes_go_to_primary(self):
+        """Test writes and reads outside views use the primary"""
+        router = ReplicaRouter()
+
+        self.assertEqual(router.db_for_write(Recipe), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_read(Recipe), DEFAULT_DB_ALIAS)
+        self.assertFalse(router.allow_migrate(REPLICA, 'core'))
+
+
+class ReplicaChoiceTests(TestCase):
+    """Test how replicas are picked"""
+
+    @override_settings(DATABASE_REPLICAS={'a': 3, 'b': 1})
+    def test_weighted(self):
+        """Test replicas are picked in proportion to their weights"""
+        random.seed(1)
+        counts = Counter(choose_replica() for _ in range(4000))
+
+        self.assertAlmostEqual(counts['a'] / 4000, 0.75, delta=0.03)
+        self.assertEqual(set(counts), {'a', 'b'})
+
+    @override_settings(DATABASE_REPLICAS={})
+    def test_no_replicas(self):
+        """Test reads stay on the primary without replicas"""
+        self.assertEqual(choose_replica(), DEFAULT_DB_ALIAS)
+
+
+class ReplicaPinTests(TestCase):
+    """Test read-your-writes pins are shared between processes"""
+
+    def setUp(self):
+        self.addCleanup(caches['default'].clear)
+        self.addCleanup(primary_pins.clear)
+
+    def test_pin_seen_by_other_process(self):
+        """Test a pin is read back by another process's pin cache"""
+        other = TieredCache('primary-pin', max_size=10, timeout=5,
+                            cache_alias='default')
+
+        with patch.object(primary_pins, 'cache_alias', 'default'):
+            pin_to_primary(7)
+
+        self.assertTrue(other.get('7', False))
+        self.assertFalse(other.get('8', False))
+
+    @override_settings(DATABASE_REPLICAS={'replica0': 1})
+    def test_replicas_need_shared_pins(self):
+        """Test replicas without a shared pin cache are refused"""
+        with patch.object(primary_pins, 'cache_alias', None):
+            with self.assertRaises(ImproperlyConfigured):
+                check_pin_cache()
+
+        with patch.object(primary_pins, 'cache_alias', 'default'):
+            check_pin_cache()
+
+    @override_settings(DATABASE_REPLICAS={})
+    def test_no_replicas_no_shared_pins(self):
+        """Test pins can stay in process when there are no replicas"""
+        with patch.object(primary_pins, 'cache_alias', None):
+            check_pin_cache()
+
+
+class ReplicaWriteTests(TestCase):
+    """Test writes stay on the primary while reads go to a replica"""
+
+    @override_settings(DATABASE_REPLICAS={'missing': 1})
+    def test_search_vector_update_on_primary(self):
+        """Test reindexing recipes writes to the primary"""
+        user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        recipe = Recipe.objects.create(
+            user=user,
+            title='Pancakes',
+            time_minutes=20,
+            price=4.00
+        )
+        Recipe.objects.filter(pk=recipe.pk).update(search_vector=None)
+
+        set_replica_reads(True)
+        self.addCleanup(set_replica_reads, False)
+        Recipe.objects.filter(pk=recipe.pk).update_search_vector()
+
+        self.assertIsNotNone(
+            Recipe.objects.using(DEFAULT_DB_ALIAS).get().search_vector
+        )
@@ -0,0 +1,108 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.slowqueries import SlowQueryLog, slow_query_log
+from recipe.cache import response_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+SLOW_QUERIES_URL = reverse('recipe:slow-queries')
+
+
+class SlowQueryTests(TestCase):
+    """Test slow queries are logged with their plans"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        Recipe.objects.create(
+            user=self.user,
+            title='Pancakes',
+            time_minutes=20,
+            price=4.00
+        )
+        slow_query_log.clear()
+        response_cache.clear()
+
+    def test_off_by_default(self):
+        """Test nothing is logged unless a threshold is set"""
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(slow_query_log.entries(), [])
+
+    @override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_EXPLAIN_RATE=1)
+    def test_slow_queries_logged(self):
+        """Test queries over the threshold are logged with a plan"""
+        self.client.get(RECIPES_URL)
+
+        entries = slow_query_log.entries()
+        self.assertTrue(entries)
+        entry = next(
+            entry for entry in entries if 'core_recipe' in entry['sql']
+        )
+        self.assertEqual(entry['route'], 'recipe:recipe-list')
+        self.assertEqual(entry['method'], 'GET')
+        self.assertEqual(entry['user_id'], self.user.id)
+        self.assertIn('Execution Time', entry['plan'])
+
+    @override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_EXPLAIN_RATE=0)
+    def test_plans_sampled(self):
+        """Test plans are only taken at the configured rate"""
+        self.client.get(RECIPES_URL)
+
+        self.assertTrue(slow_query_log.entries())
+        self.assertTrue(all(
+            entry['plan'] is None for entry in slow_query_log.entries()
+        ))
+
+    @override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_EXPLAIN_RATE=1)
+    def test_secrets_not_logged(self):
+        """Test parameter values, like token keys, are left out"""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        client.get(RECIPES_URL)
+
+        entries = slow_query_log.entries()
+        self.assertTrue(any(
+            'authtoken_token' in entry['sql'] and entry['plan']
+            for entry in entries
+        ))
+        self.assertNotIn(token.key, json.dumps(entries))
+        self.assertIn('str', entries[-1]['param_types'])
+
+    def test_log_bounded(self):
+        """Test only the newest entries are kept"""
+        log = SlowQueryLog(2)
+        for i in range(3):
+            log.add({'sql': str(i)})
+
+        self.assertEqual([entry['sql'] for entry in log.entries()],
+                         ['2', '1'])
+
+    def test_staff_only(self):
+        """Test only staff can read the log"""
+        staff = get_user_model().objects.create_user(
+            'staff@testing.com',
+            'TestPasswd123@',
+            is_staff=True
+        )
+        slow_query_log.add({'sql': 'SELECT 1'})
+
+        denied = self.client.get(SLOW_QUERIES_URL)
+        self.client.force_authenticate(staff)
+        allowed = self.client.get(SLOW_QUERIES_URL)
+
+        self.assertEqual(denied.status_code, 403)
+        self.assertEqual(allowed.status_code, 200)
+        self.assertEqual(allowed.data, [{'sql': 'SELECT 1'}])
@@ -0,0 +1,26 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Assertions that an endpoint's query count doesn't grow with its data"""
+
+    def assertQueriesConstant(self, request, grow, max_queries=None):
+        """Fail if request() runs more queries once grow() has added rows"""
+        with CaptureQueriesContext(connection) as before:
+            request()
+        grow()
+        with CaptureQueriesContext(connection) as after:
+            request()
+
+        self.assertEqual(
+            len(before),
+            len(after),
+            'Query count grew from {} to {} with result size:\n{}'.format(
+                len(before),
+                len(after),
+                '\n'.join(query['sql'] for query in after.captured_queries)
+            )
+        )
+        if max_queries is not None:
+            self.assertLessEqual(len(after), max_queries)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from core.metrics import request_metrics
+
+
+@require_GET
+def metrics(request):
+    """Return this process's request and cache metrics for Prometheus
+
+    Readers need the METRICS_TOKEN bearer token, or a staff session.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not request.user.is_staff:
+        if not token:
+            return HttpResponse(status=403)
+        if not constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            f'Bearer {token}'
+        ):
+            return HttpResponse(status=401)
+
+    return HttpResponse(
+        request_metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
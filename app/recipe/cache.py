@@ -0,0 +1,51 @@
+import hashlib
+from collections import OrderedDict
+
+from django.conf import settings
+
+from core.cache import TieredCache
+
+response_cache = TieredCache(
+    'recipe-response',
+    max_size=getattr(settings, 'RECIPE_CACHE_SIZE', 5000),
+    max_bytes=getattr(settings, 'RECIPE_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+    timeout=getattr(settings, 'RECIPE_CACHE_TIMEOUT', 300),
+    cache_alias=getattr(settings, 'RECIPE_CACHE_ALIAS', None)
+)
+
+
+def response_cache_key(request, action, version):
+    """Return the cache key for a read of a user's data at version
+
+    The version is bumped by signals on every write to the user's
+    recipes, tags, ingredients and their links, so a write moves all of
+    the user's reads onto new keys and the old entries age out.
+    """
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    key = '\n'.join([
+        str(request.user.pk),
+        str(version),
+        action,
+        # Responses hold absolute URLs, e.g. pagination links and images
+        request.build_absolute_uri('/'),
+        request.path,
+        repr(params)
+    ])
+
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def detach(data):
+    """Return a plain copy of serialized data, dropping serializer refs"""
+    if isinstance(data, dict):
+        return OrderedDict(
+            (key, detach(value)) for key, value in data.items()
+        )
+    if isinstance(data, list):
+        return [detach(item) for item in data]
+
+    return data
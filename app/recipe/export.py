@@ -0,0 +1,60 @@
+from collections import OrderedDict, defaultdict
+
+from core.models import Recipe
+
+# Columns of an exported recipe, in order; relations are listed by name
+EXPORT_FIELDS = (
+    'id', 'title', 'time_minutes', 'price', 'link', 'tags', 'ingredients'
+)
+RELATED_FIELDS = ('tags', 'ingredients')
+
+
+def export_rows(queryset, chunk_size=2000):
+    """Yield an OrderedDict per recipe in queryset, a chunk at a time
+
+    Recipes are read through a server-side cursor, and the names of their
+    tags and ingredients are loaded per chunk, so memory use doesn't grow
+    with the number of recipes. Names are read from queryset's database.
+    """
+    columns = [name for name in EXPORT_FIELDS if name not in RELATED_FIELDS]
+    rows = queryset.prefetch_related(None).values_list(*columns).iterator(
+        chunk_size=chunk_size
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield from _export_chunk(queryset.db, columns, chunk)
+            chunk = []
+    if chunk:
+        yield from _export_chunk(queryset.db, columns, chunk)
+
+
+def _export_chunk(db, columns, chunk):
+    """Yield the export rows for a chunk of recipe column values"""
+    ids = [row[0] for row in chunk]
+    names = {
+        name: _related_names(db, name, ids) for name in RELATED_FIELDS
+    }
+    for row in chunk:
+        recipe = OrderedDict(zip(columns, row))
+        recipe['price'] = f'{recipe["price"]:f}'
+        for name in RELATED_FIELDS:
+            recipe[name] = names[name][recipe['id']]
+        yield OrderedDict((name, recipe[name]) for name in EXPORT_FIELDS)
+
+
+def _related_names(db, field_name, ids):
+    """Return {recipe id: [names]} of the recipes' links via field_name"""
+    field = Recipe._meta.get_field(field_name)
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    links = field.remote_field.through.objects.using(db).filter(
+        **{f'{source}__in': ids}
+    ).order_by(source, target).values_list(source, f'{target}__name')
+
+    names = defaultdict(list)
+    for recipe_id, name in links:
+        names[recipe_id].append(name)
+
+    return names
@@ -0,0 +1,99 @@
+from collections import OrderedDict, defaultdict
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+# Fields whose representation of a database value is the value itself
+PASSTHROUGH_FIELDS = (serializers.IntegerField, serializers.CharField)
+
+
+class FastListSerializer:
+    """Build a model serializer's list output from values() rows
+
+    Gives the same data as serializing model instances, without creating
+    them or running every field per row. Plain and annotated columns are
+    read from the rows, and primary key relations from one query on each
+    through table, grouped by row. Related ids are listed in id order,
+    as the relation fields list them.
+    """
+
+    def __init__(self, serializer):
+        self.fields = serializer.fields
+        self.model = serializer.Meta.model
+        for name, field in self.fields.items():
+            if '.' in field.source or field.source == '*':
+                raise ImproperlyConfigured(
+                    f'{type(self).__name__} can\'t read field {name!r} '
+                    f'from a column: its source is {field.source!r}'
+                )
+
+    def values(self, queryset):
+        """Return queryset's rows holding the columns the fields need"""
+        pk = self.model._meta.pk.name
+        columns = [
+            field.source for field in self.fields.values()
+            if not self._is_many(field)
+        ]
+        ordering = [name.lstrip('-') for name in queryset.query.order_by]
+
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys([pk] + columns + ordering)
+        )
+
+    def to_representation(self, rows):
+        """Return the serialized data for a list of rows"""
+        pk = self.model._meta.pk.name
+        getters = []
+        for name, field in self.fields.items():
+            if self._is_many(field):
+                related = self._related_ids(field.source, rows)
+                getters.append(
+                    (name, lambda row, related=related: related[row[pk]])
+                )
+            else:
+                getters.append((name, self._column_getter(field)))
+
+        return [
+            OrderedDict((name, get(row)) for name, get in getters)
+            for row in rows
+        ]
+
+    def _is_many(self, field):
+        """Return whether field lists the pks of a many to many relation"""
+        return isinstance(field, serializers.ManyRelatedField) and \
+            isinstance(field.child_relation,
+                       serializers.PrimaryKeyRelatedField) and \
+            field.child_relation.pk_field is None
+
+    def _column_getter(self, field):
+        """Return a function giving field's representation of a row"""
+        source = field.source
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return lambda row: row[source]
+
+        def get(row):
+            value = row[source]
+            return None if value is None else field.to_representation(value)
+
+        return get
+
+    def _related_ids(self, name, rows):
+        """Return {pk: [related ids]} for the rows' links through name"""
+        relation = self.model._meta.get_field(name)
+        if not relation.many_to_many or relation.auto_created:
+            raise ImproperlyConfigured(
+                f'{type(self).__name__} can only list the pks of a many to '
+                f'many field declared on {self.model.__name__}, not {name!r}'
+            )
+        source = relation.m2m_field_name()
+        target = relation.m2m_reverse_field_name()
+        related = defaultdict(list)
+        pks = [row[self.model._meta.pk.name] for row in rows]
+        if pks:
+            links = relation.remote_field.through.objects.filter(
+                **{f'{source}__in': pks}
+            ).order_by(source, target).values_list(source, target)
+            for pk, related_id in links:
+                related[pk].append(related_id)
+
+        return related
@@ -0,0 +1,174 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from recipe.images import get_storage
+
+
+class UserOwnedManyRelatedField(serializers.ManyRelatedField):
+    """Many related field that resolves its whole pk list in one query
+
+    Related objects are listed in pk order, however they were loaded.
+    """
+
+    def to_representation(self, iterable):
+        return [
+            self.child_relation.to_representation(value)
+            for value in sorted(iterable, key=lambda value: value.pk)
+        ]
+
+    def to_internal_value(self, data):
+        """Return the objects for a list of primary keys"""
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        return self.child_relation.resolve(data)
+
+
+class UserOwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field limited to objects owned by the requesting user"""
+    default_error_messages = {
+        'does_not_exist': _(
+            'Invalid pk "{pk_value}" - object does not exist.'
+        ),
+        'many_do_not_exist': _(
+            'Invalid pks "{pk_values}" - objects do not exist.'
+        ),
+    }
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._resolved = {}
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """Wrap the field in a UserOwnedManyRelatedField for many=True"""
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return UserOwnedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        """Return only the requesting user's objects"""
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset.none()
+
+        return queryset.filter(user=request.user)
+
+    def to_internal_value(self, data):
+        """Return the object for a single primary key"""
+        return self.resolve([data])[0]
+
+    def prime(self, data):
+        """Load the objects for every valid pk in data with one query"""
+        pks = [pk for pk in map(self._to_pk, data) if pk is not None]
+        missing = [pk for pk in pks if pk not in self._resolved]
+        if missing:
+            self._resolved.update(
+                self.get_queryset().only('pk').in_bulk(missing)
+            )
+
+    def resolve(self, data):
+        """Return the objects for a list of pks, reporting all missing"""
+        pks = []
+        for value in data:
+            pk = self._to_pk(value)
+            if pk is None:
+                self.fail('incorrect_type', data_type=type(value).__name__)
+            pks.append(pk)
+
+        self.prime(pks)
+        missing = [pk for pk in pks if pk not in self._resolved]
+        if len(missing) == 1:
+            self.fail('does_not_exist', pk_value=missing[0])
+        elif missing:
+            self.fail(
+                'many_do_not_exist',
+                pk_values=', '.join(str(pk) for pk in missing)
+            )
+
+        return [self._resolved[pk] for pk in pks]
+
+    def _to_pk(self, value):
+        """Return value as an integer primary key, or None if it isn't one"""
+        if isinstance(value, bool):
+            return None
+        try:
+            pk = int(value)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        if isinstance(value, (float, Decimal)) and pk != value:
+            return None
+
+        return pk
+
+
+class BoundedImageField(serializers.ImageField):
+    """Image field that checks pixel dimensions before any decoding
+
+    Only the image header is read to find the dimensions, so oversized
+    images and decompression bombs are refused without allocating their
+    pixel data.
+    """
+    default_error_messages = {
+        'too_many_pixels': _(
+            'Image is {width}x{height}; it must have at most {max_pixels} '
+            'pixels.'
+        ),
+    }
+
+    def to_internal_value(self, data):
+        """Check the image's dimensions, then validate it as usual"""
+        max_pixels = getattr(settings, 'RECIPE_IMAGE_MAX_PIXELS', 25000000)
+        size = None
+        try:
+            with Image.open(data) as image:
+                size = image.size
+        except Image.DecompressionBombError:
+            self.fail('too_many_pixels', width='?', height='?',
+                      max_pixels=max_pixels)
+        except Exception:
+            # Not an image at all; the standard validation reports it
+            pass
+        finally:
+            if hasattr(data, 'seek'):
+                data.seek(0)
+
+        if size is not None and size[0] * size[1] > max_pixels:
+            self.fail('too_many_pixels', width=size[0], height=size[1],
+                      max_pixels=max_pixels)
+
+        return super().to_internal_value(data)
+
+
+class ImageVariantsField(serializers.Field):
+    """Read-only field giving the URLs of an image's resized variants"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        """Return {width: {format: url}} for the stored variant names"""
+        storage = get_storage()
+        request = self.context.get('request')
+        variants = {}
+        for width, formats in value.items():
+            variants[width] = {}
+            for image_format, name in formats.items():
+                url = storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                variants[width][image_format] = url
+
+        return variants
@@ -0,0 +1,116 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image
+
+from core.models import ChangeVersion, Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (160, 640, 1280)
+VARIANT_FORMATS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+_executor = None
+
+
+def get_executor():
+    """Return the worker pool that renders image variants"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'RECIPE_IMAGE_WORKERS', 2),
+            thread_name_prefix='recipe-image'
+        )
+
+    return _executor
+
+
+def get_storage():
+    """Return the storage recipe images are saved in"""
+    return Recipe._meta.get_field('image').storage
+
+
+def variant_name(name, width, image_format):
+    """Return the storage name for one variant of an image"""
+    root, _ = os.path.splitext(name)
+
+    return f'{root}_{width}.{VARIANT_FORMATS[image_format]}'
+
+
+def render_variants(name):
+    """Save resized copies of a stored image, returning their names
+
+    Variants are never wider than the original, and are keyed by width
+    then format, e.g. {'160': {'jpeg': ..., 'webp': ...}}.
+    """
+    storage = get_storage()
+    with storage.open(name) as image_file:
+        with Image.open(image_file) as original:
+            original.load()
+            image = original.convert('RGB')
+
+    variants = {}
+    for width in VARIANT_WIDTHS:
+        resized = image
+        if image.width > width:
+            resized = image.copy()
+            resized.thumbnail((width, image.height), Image.LANCZOS)
+        for image_format in VARIANT_FORMATS:
+            buffer = io.BytesIO()
+            resized.save(buffer, format=image_format, quality=80)
+            saved = storage.save(
+                variant_name(name, width, image_format),
+                ContentFile(buffer.getvalue())
+            )
+            variants.setdefault(str(width), {})[image_format] = saved
+
+    return variants
+
+
+def delete_variants(variants):
+    """Remove variant files from storage"""
+    storage = get_storage()
+    for formats in variants.values():
+        for name in formats.values():
+            storage.delete(name)
+
+
+def generate_variants(recipe_id, name):
+    """Render the variants of a recipe's image and record them
+
+    If the recipe's image has changed since name was uploaded, the new
+    variants are discarded rather than attached to the wrong image.
+    """
+    variants = render_variants(name)
+    updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_variants=variants
+    )
+    if updated:
+        ChangeVersion.objects.filter(user__recipe=recipe_id).bump()
+    else:
+        delete_variants(variants)
+
+    return variants
+
+
+def _run_generate_variants(recipe_id, name):
+    """Worker entry point for generate_variants"""
+    try:
+        generate_variants(recipe_id, name)
+    except Exception:
+        logger.exception('Could not render variants of %s', name)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(recipe):
+    """Render a recipe's image variants in the worker pool after commit"""
+    recipe_id, name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: get_executor().submit(_run_generate_variants, recipe_id, name)
+    )
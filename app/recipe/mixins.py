@@ -0,0 +1,204 @@
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.utils.cache import parse_etags, patch_cache_control, \
+    patch_vary_headers
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.models import ChangeVersion
+from recipe.cache import detach, response_cache, response_cache_key
+from recipe.fastlist import FastListSerializer
+
+
+def wrap_read_handler(view, request, wrapper):
+    """Route a list or detail GET through wrapper(handler, request, ...)
+
+    The handler is swapped for this request only, so views keep exactly
+    the actions, and routes, they define.
+    """
+    method = request.method.lower()
+    if view.action in ('list', 'retrieve') and method in ('get', 'head'):
+        setattr(view, method, partial(wrapper, getattr(view, method)))
+
+
+class ChangeVersionMixin:
+    """Look up the requesting user's change version once per request"""
+
+    def get_change_version(self):
+        """Return the user's ChangeVersion counter"""
+        if not hasattr(self, '_change_version'):
+            self._change_version = ChangeVersion.objects.get_version(
+                self.request.user.pk
+            )
+
+        return self._change_version
+
+
+class ChangeVersionETagMixin(ChangeVersionMixin):
+    """Answer conditional list and detail requests from a change counter
+
+    The ETag is derived from the user's ChangeVersion and the request, so
+    an unchanged resource is confirmed with a single small query and none
+    on the recipe tables.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        wrap_read_handler(self, request, self.conditional_response)
+
+    def get_etag(self, request):
+        """Return the ETag for the request at the user's current version"""
+        key = '\n'.join([
+            str(request.user.pk),
+            str(self.get_change_version()),
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', '')
+        ])
+
+        return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Return 304 if the client's copy is current, else call handler"""
+        etag = self.get_etag(request)
+        if self._etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+
+        return response
+
+    def _etag_matches(self, request, etag):
+        """Return whether If-None-Match names etag, comparing weakly"""
+        header = request.META.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return False
+
+        etags = parse_etags(header)
+        if '*' in etags:
+            # Any current representation matches, once it's known to exist
+            if self.action == 'retrieve':
+                self.get_object()
+            return True
+
+        return any(opaque_tag(value) == opaque_tag(etag) for value in etags)
+
+
+def opaque_tag(etag):
+    """Return an ETag without its weakness indicator"""
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+class CachedResponseMixin(ChangeVersionMixin):
+    """Serve list and detail data from the response cache
+
+    Entries are keyed by the user's change version, so they never outlive
+    a write to the user's data.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        wrap_read_handler(self, request, self.cached_response)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Return cached data for the request, or call handler and cache"""
+        key = response_cache_key(
+            request,
+            self.action,
+            self.get_change_version()
+        )
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(key, detach(response.data))
+
+        return response
+
+
+class SparseFieldsMixin:
+    """Let list and detail requests name the fields they need in ?fields=
+
+    Only the named fields are serialized, and only the matching columns
+    are loaded.
+    """
+    sparse_field_actions = ('list', 'retrieve')
+
+    def get_requested_fields(self):
+        """Return the fields named in ?fields=, or None for all of them"""
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = self._parse_requested_fields()
+
+        return self._requested_fields
+
+    def _parse_requested_fields(self):
+        """Read and check ?fields= against the serializer's fields"""
+        param = self.request.query_params.get('fields')
+        if param is None or self.action not in self.sparse_field_actions:
+            return None
+
+        fields = list(dict.fromkeys(
+            name.strip() for name in param.split(',') if name.strip()
+        ))
+        available = self.get_serializer_class().Meta.fields
+        unknown = [name for name in fields if name not in available]
+        if unknown or not fields:
+            raise ValidationError({'fields': _(
+                'Choose from: {available}.'
+            ).format(available=', '.join(available))})
+
+        return fields
+
+    def get_serializer_context(self):
+        """Pass the requested fields on to the serializer"""
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+
+        return context
+
+    def only_requested_fields(self, queryset):
+        """Load only the columns the requested fields and ordering need"""
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset
+
+        columns = {
+            field.name for field in queryset.model._meta.concrete_fields
+        }
+        ordering = [name.lstrip('-') for name in queryset.query.order_by]
+        needed = [queryset.model._meta.pk.name] + [
+            name for name in fields + ordering if name in columns
+        ]
+
+        return queryset.only(*dict.fromkeys(needed))
+
+
+class FastListMixin:
+    """Serialize list pages straight from values() rows
+
+    Enabled by the RECIPE_FAST_LISTS setting. The output is the same as
+    the serializer class gives for model instances.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'RECIPE_FAST_LISTS', False):
+            return super().list(request, *args, **kwargs)
+
+        serializer = FastListSerializer(self.get_serializer())
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serializer.to_representation(queryset))
+
+        return self.get_paginated_response(serializer.to_representation(page))
@@ -0,0 +1,197 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, \
+    ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginate on the queryset's ordering using opaque keyset cursors
+
+    The queryset must be ordered by plain field or annotation names, the
+    last of which is unique, e.g. ('-name', '-id'). Pages are fetched with
+    a WHERE clause on the ordering columns rather than an OFFSET, so every
+    page costs the same no matter how deep it is.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-id',)
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return the page of results the request's cursor points at"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.clean_position(queryset, position)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = None
+        self.previous_position = None
+        if results and has_next:
+            self.next_position = self._get_position(results[-1])
+        if results and has_previous:
+            self.previous_position = self._get_position(results[0])
+
+        return results
+
+    def get_paginated_response(self, data):
+        """Wrap a page of serialized results with its navigation links"""
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_page_size(self, request):
+        """Return the requested page size, bounded by max_page_size"""
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, queryset):
+        """Return the ordering fields of the queryset, or the default"""
+        ordering = tuple(queryset.query.order_by) or self.ordering
+        for field in ordering:
+            if not isinstance(field, str) or '__' in field:
+                raise ImproperlyConfigured(
+                    'KeysetPagination needs plain field names to order by, '
+                    'got {!r}'.format(field)
+                )
+
+        return ordering
+
+    def get_next_link(self):
+        """Return the URL of the following page, if there is one"""
+        if self.next_position is None:
+            return None
+
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        """Return the URL of the preceding page, if there is one"""
+        if self.previous_position is None:
+            return None
+
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def decode_cursor(self, request):
+        """Return the (position, reverse) pair encoded in the cursor"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(
+                base64.urlsafe_b64decode(encoded.encode('ascii')).decode()
+            )
+            position = cursor['p']
+            reverse = bool(cursor.get('r', False))
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def clean_position(self, queryset, position):
+        """Convert a decoded position to its ordering fields' types"""
+        cleaned = []
+        for field, value in zip(self.ordering, position):
+            if isinstance(value, (dict, list)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                cleaned.append(
+                    self._output_field(queryset, field.lstrip('-'))
+                    .to_python(value)
+                )
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        return cleaned
+
+    def encode_cursor(self, position, reverse):
+        """Return the current URL with the cursor for position in it"""
+        cursor = {'p': position}
+        if reverse:
+            cursor['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(cursor, separators=(',', ':')).encode()
+        ).decode('ascii')
+        url = self.request.build_absolute_uri()
+
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def _get_position(self, item):
+        """Return the ordering values of a model instance or values() row"""
+        position = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if isinstance(item, dict):
+                position.append(item[name])
+            else:
+                position.append(getattr(item, name))
+
+        return position
+
+    def _output_field(self, queryset, name):
+        """Return the model or annotation field an ordering name refers to"""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        if name == 'pk':
+            return queryset.model._meta.pk
+        try:
+            return queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                f'KeysetPagination can\'t order by unknown field {name!r}'
+            )
+
+    def _after(self, ordering, position):
+        """Build the filter for rows sorted after position in ordering"""
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+
+        return condition
+
+    def _invert(self, field):
+        """Flip the direction of an ordering field"""
+        return field[1:] if field.startswith('-') else f'-{field}'
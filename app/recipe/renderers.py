@@ -0,0 +1,79 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class StreamingRenderer(BaseRenderer):
+    """Renderer that can also encode rows one at a time for streaming"""
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = [data]
+
+        return b''.join(self.stream(data))
+
+    def stream(self, rows, fields=None):
+        """Yield the encoded output for an iterable of dicts
+
+        fields names the keys of every row, when they are known up front.
+        """
+        raise NotImplementedError('stream() must be implemented.')
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """Render rows as newline-delimited JSON, one object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, rows, fields=None):
+        for row in rows:
+            line = json.dumps(row, ensure_ascii=False, separators=(',', ':'))
+            yield f'{line}\n'.encode(self.charset)
+
+
+class _Line:
+    """File-like object handing back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(StreamingRenderer):
+    """Render rows as CSV with a header line
+
+    List values are written to a single column as a JSON array, so names
+    holding commas, semicolons or quotes read back unchanged.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    @staticmethod
+    def encode_list(values):
+        """Return the column value holding a list"""
+        return json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def decode_list(value):
+        """Return the list held in a column value, empty if it's blank"""
+        values = json.loads(value) if value.strip() else []
+        if not isinstance(values, list):
+            raise ValueError('expected a JSON array')
+
+        return values
+
+    def stream(self, rows, fields=None):
+        writer = csv.writer(_Line())
+        if fields is not None:
+            yield writer.writerow(fields).encode(self.charset)
+        for row in rows:
+            if fields is None:
+                fields = list(row)
+                yield writer.writerow(fields).encode(self.charset)
+            yield writer.writerow([
+                self.encode_list(value) if isinstance(value, list) else value
+                for value in row.values()
+            ]).encode(self.charset)
@@ -1,9 +1,115 @@
+from collections import OrderedDict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
-from core.models import Ingredient, Recipe, Tag
+from core.models import ChangeVersion, Ingredient, Recipe, Tag
+from recipe.fields import (
+    BoundedImageField,
+    ImageVariantsField,
+    UserOwnedManyRelatedField,
+    UserOwnedPrimaryKeyRelatedField
+)
+
+
+class RequestedFieldsMixin:
+    """Serialize only the fields named in the context's 'fields'
+
+    Applies to the top-level objects only, so nested serializers keep
+    all of their fields.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if requested is None or parent is not None:
+            return fields
+
+        return OrderedDict(
+            (name, field) for name, field in fields.items()
+            if name in requested
+        )
+
+
+class RecipeAttrSerializer(RequestedFieldsMixin, serializers.ModelSerializer):
+    """Common validation for tags and ingredients"""
+
+    def validate_name(self, value):
+        """Reject a name the user already has, ignoring case"""
+        request = self.context.get('request')
+        if request is None:
+            return value
+
+        if self._name_taken(request.user, value):
+            raise self._name_taken_error(value)
+
+        return value
 
+    def save(self, **kwargs):
+        """Save, reporting a name taken since validation as invalid
 
-class TagSerializer(serializers.ModelSerializer):
+        A concurrent request can create the same name after validate_name
+        ran, which the unique index on the user and name then rejects.
+        """
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            name = self.validated_data.get('name')
+            user = kwargs.get('user', getattr(self.instance, 'user', None))
+            if name is None or user is None or \
+                    not self._name_taken(user, name):
+                raise
+            raise serializers.ValidationError(
+                {'name': self._name_taken_error(name).detail}
+            )
+
+    def _name_taken(self, user, name):
+        """Return whether user has another object named name, in any case"""
+        existing = self.Meta.model.objects.filter(user=user, name__iexact=name)
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+
+        return existing.exists()
+
+    def _name_taken_error(self, name):
+        """Return the validation error for a name the user already has"""
+        return serializers.ValidationError(
+            _('You already have one named "{name}".').format(name=name),
+            code='unique'
+        )
+
+
+class NameListSerializer(serializers.Serializer):
+    """Serializer for a list of tag or ingredient names"""
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """Serializer for autocomplete query parameters"""
+    q = serializers.CharField(
+        max_length=255,
+        allow_blank=True,
+        trim_whitespace=False,
+        default=''
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=50,
+        default=10
+    )
+
+
+class TagSerializer(RecipeAttrSerializer):
     """Serializer for our tag model"""
 
     class Meta:
@@ -12,7 +118,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(RecipeAttrSerializer):
     """Serializer for the ingredient model"""
 
     class Meta:
@@ -21,22 +127,129 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class TagCountSerializer(TagSerializer):
+    """Serializer for a tag with the number of recipes using it"""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ('recipe_count',)
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    """Serializer for an ingredient with the number of recipes using it"""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ('recipe_count',)
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Serializer for creating a batch of recipes in a few queries"""
+    max_items = 1000
+    skip_invalid = False
+
+    def to_internal_value(self, data):
+        """Validate every item, optionally setting invalid ones aside"""
+        if not isinstance(data, list):
+            raise serializers.ValidationError(
+                _('Expected a list of items.'),
+                code='not_a_list'
+            )
+        if len(data) > self.max_items:
+            raise serializers.ValidationError(
+                _('Ensure this list has no more than {max_items} items.')
+                .format(max_items=self.max_items),
+                code='max_length'
+            )
+
+        self.prime_related(data)
+
+        validated = []
+        errors = []
+        self.item_errors = []
+        for index, item in enumerate(data):
+            try:
+                validated.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+                self.item_errors.append(
+                    {'index': index, 'errors': exc.detail}
+                )
+
+        if any(errors) and not self.skip_invalid:
+            raise serializers.ValidationError(errors)
+
+        return validated
+
+    def prime_related(self, data):
+        """Resolve every item's related pks with one query per field"""
+        for name, field in self.child.fields.items():
+            if not isinstance(field, UserOwnedManyRelatedField):
+                continue
+            pks = []
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                if isinstance(value, list):
+                    pks.extend(value)
+            field.child_relation.prime(pks)
+
+    def create(self, validated_data):
+        """Insert the recipes, then all of each relation's links at once"""
+        m2m_fields = ('ingredients', 'tags')
+        related = [
+            {name: item.pop(name, []) for name in m2m_fields}
+            for item in validated_data
+        ]
+
+        with transaction.atomic():
+            recipes = Recipe.objects.bulk_create(
+                [Recipe(**item) for item in validated_data]
+            )
+            for name in m2m_fields:
+                field = Recipe._meta.get_field(name)
+                through = field.remote_field.through
+                column = f'{field.m2m_reverse_field_name()}_id'
+                through.objects.bulk_create([
+                    through(recipe_id=recipe.id, **{column: obj.id})
+                    for recipe, links in zip(recipes, related)
+                    for obj in dict.fromkeys(links[name])
+                ])
+            if recipes:
+                Recipe.objects.filter(
+                    pk__in=[recipe.id for recipe in recipes]
+                ).update_search_vector()
+                ChangeVersion.objects.filter(
+                    user_id__in={recipe.user_id for recipe in recipes}
+                ).bump()
+
+        prefetch_related_objects(
+            recipes,
+            Prefetch('tags', queryset=Tag.objects.only('id')),
+            Prefetch('ingredients', queryset=Ingredient.objects.only('id'))
+        )
+
+        return recipes
+
+
+class RecipeSerializer(RequestedFieldsMixin, serializers.ModelSerializer):
     """Serializer for a recipe"""
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserOwnedPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserOwnedPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'title', 'ingredients', 'tags',
-                  'time_minutes', 'price', 'link')
+                  'time_minutes', 'price', 'link', 'image_variants')
         read_only_fields = ('id',)
+        list_serializer_class = RecipeListSerializer
 
 
 class RecipeDetailSerializer(RecipeSerializer):
@@ -47,8 +260,10 @@ class RecipeDetailSerializer(RecipeSerializer):
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for upload images to recipes"""
+    image = BoundedImageField(allow_null=True, required=False)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_variants')
         read_only_fields = ('id',)
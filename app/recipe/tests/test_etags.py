@@ -0,0 +1,172 @@
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ChangeVersion, Ingredient, Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+TAGS_BULK_URL = reverse('recipe:tag-bulk-get-or-create')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class ConditionalGetTests(TestCase):
+    """Test list and detail views answer If-None-Match"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def etag(self, url, params=None):
+        """Return the ETag of a successful GET"""
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res['ETag']
+
+    def assertNotModified(self, url, etag):
+        """Check a conditional GET is answered with one query"""
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_unchanged_resources_not_modified(self):
+        """Test a matching ETag gets 304 from every list and detail view"""
+        for url in [RECIPES_URL, detail_url(self.recipe.id), TAGS_URL,
+                    INGREDIENTS_URL]:
+            self.assertNotModified(url, self.etag(url))
+
+    def test_strong_form_matches(self):
+        """Test an ETag sent without W/ still matches weakly"""
+        etag = self.etag(RECIPES_URL)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag[2:])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_wildcard_needs_existing_object(self):
+        """Test If-None-Match: * is only not modified if the object exists"""
+        res = self.client.get(detail_url(self.recipe.id),
+                              HTTP_IF_NONE_MATCH='*')
+        missing = self.client.get(detail_url(self.recipe.id + 1),
+                                  HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_etag_differs_by_url(self):
+        """Test different queries of the same data get different ETags"""
+        self.assertNotEqual(
+            self.etag(TAGS_URL),
+            self.etag(TAGS_URL, {'assigned_only': 1})
+        )
+
+    def test_stale_etag_gets_full_response(self):
+        """Test a write makes previously issued ETags stale"""
+        etag = self.etag(RECIPES_URL)
+        Recipe.objects.create(
+            user=self.user,
+            title='Stew',
+            time_minutes=10,
+            price=5.00
+        )
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_writes_bump_version(self):
+        """Test every kind of write to a user's data bumps their version"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+
+        def get_version():
+            return ChangeVersion.objects.get(user=self.user).version
+
+        writes = [
+            lambda: self.recipe.tags.add(tag),
+            lambda: tag.recipe_set.remove(self.recipe),
+            lambda: self.recipe.ingredients.set([ingredient]),
+            lambda: self.client.patch(
+                detail_url(self.recipe.id),
+                {'title': 'Broth'}
+            ),
+            lambda: self.client.post(
+                TAGS_BULK_URL,
+                {'names': ['Quick']},
+                format='json'
+            ),
+            lambda: self.client.post(RECIPES_URL, [{
+                'title': 'Stew',
+                'ingredients': [],
+                'tags': [],
+                'time_minutes': 10,
+                'price': '5.00'
+            }], format='json'),
+            lambda: ingredient.delete(),
+        ]
+        for write in writes:
+            version = get_version()
+            write()
+            self.assertGreater(get_version(), version)
+
+    @patch('recipe.views.images.schedule_variants')
+    def test_image_upload_bumps_version(self, mock_schedule):
+        """Test uploading an image makes the recipe's ETag stale"""
+        url = detail_url(self.recipe.id)
+        etag = self.etag(url)
+        upload_url = reverse(
+            'recipe:recipe-upload-image',
+            args=[self.recipe.id]
+        )
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            upload = self.client.post(
+                upload_url,
+                {'image': ntf},
+                format='multipart'
+            )
+        self.assertEqual(upload.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.recipe.image.delete()
+
+    def test_other_users_writes_ignored(self):
+        """Test another user's changes don't invalidate ETags"""
+        etag = self.etag(RECIPES_URL)
+        user2 = get_user_model().objects.create_user(
+            'other@testing.com',
+            'TestPasswd123@'
+        )
+        Tag.objects.create(user=user2, name='Vegan')
+
+        self.assertNotModified(RECIPES_URL, etag)
@@ -0,0 +1,135 @@
+import csv
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.views import RecipeViewSet
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class PublicExportApiTests(TestCase):
+    """Test exporting recipes requires a login"""
+
+    def test_login_required(self):
+        """Test that login is required"""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateExportApiTests(TestCase):
+    """Test streaming exports of the user's recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.soup = Recipe.objects.create(
+            user=self.user,
+            title='Soup, "hot"',
+            time_minutes=10,
+            price=5.5,
+            link='https://example.com/soup'
+        )
+        self.soup.tags.add(self.quick, self.vegan)
+        self.soup.ingredients.add(salt)
+        self.salad = Recipe.objects.create(
+            user=self.user,
+            title='Crème salad',
+            time_minutes=5,
+            price=3
+        )
+        other = get_user_model().objects.create_user(
+            'other@testing.com',
+            'TestPasswd123@'
+        )
+        Recipe.objects.create(user=other, title='Not mine', time_minutes=1,
+                              price=1)
+
+    def export(self, params=None, **extra):
+        """Return the streamed response and its full content"""
+        res = self.client.get(EXPORT_URL, params, **extra)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+
+        return res, b''.join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        """Test recipes are exported one JSON object per line by default"""
+        res, content = self.export()
+
+        self.assertEqual(res['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        self.assertIn('recipes.ndjson', res['Content-Disposition'])
+        self.assertEqual([json.loads(line) for line in content.splitlines()], [
+            {'id': self.salad.id, 'title': 'Crème salad', 'time_minutes': 5,
+             'price': '3.00', 'link': '', 'tags': [], 'ingredients': []},
+            {'id': self.soup.id, 'title': 'Soup, "hot"', 'time_minutes': 10,
+             'price': '5.50', 'link': 'https://example.com/soup',
+             'tags': ['Vegan', 'Quick'], 'ingredients': ['Salt']},
+        ])
+
+    def test_export_csv(self):
+        """Test recipes are exported as CSV with ?format=csv"""
+        res, content = self.export({'format': 'csv'})
+
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], [
+            'id', 'title', 'time_minutes', 'price', 'link', 'tags',
+            'ingredients'
+        ])
+        self.assertEqual(rows[2], [
+            str(self.soup.id), 'Soup, "hot"', '10', '5.50',
+            'https://example.com/soup', '["Vegan","Quick"]', '["Salt"]'
+        ])
+        self.assertEqual(rows[1][-2:], ['[]', '[]'])
+
+    def test_export_csv_from_accept_header(self):
+        """Test the format can be negotiated with the Accept header"""
+        res, content = self.export(HTTP_ACCEPT='text/csv')
+
+        self.assertTrue(content.startswith('id,title,'))
+
+    def test_export_empty_csv_has_header(self):
+        """Test exporting no recipes still gives the CSV header"""
+        _, content = self.export({'format': 'csv', 'search': 'nothing'})
+
+        self.assertEqual(content.splitlines(), [
+            'id,title,time_minutes,price,link,tags,ingredients'
+        ])
+
+    def test_export_filtered(self):
+        """Test the list filters narrow the export"""
+        _, content = self.export({'tags': str(self.vegan.id)})
+
+        self.assertEqual(len(content.splitlines()), 1)
+        self.assertEqual(json.loads(content)['id'], self.soup.id)
+
+    def test_export_loads_relations_per_chunk(self):
+        """Test the queries grow with the chunks, not the recipes"""
+        for i in range(3):
+            Recipe.objects.create(user=self.user, title=f'Pie {i}',
+                                  time_minutes=1, price=1)
+
+        with patch.object(RecipeViewSet, 'export_chunk_size', 2):
+            res = self.client.get(EXPORT_URL)
+            # The recipe cursor, then two name queries per chunk of two
+            with self.assertNumQueries(1 + 3 * 2):
+                content = b''.join(res.streaming_content)
+
+        self.assertEqual(len(content.splitlines()), 5)
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+FACETS_URL = reverse('recipe:recipe-facets')
+
+
+class RecipeFacetsTests(TestCase):
+    """Test recipe counts per tag and ingredient"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.rice = Ingredient.objects.create(user=self.user, name='Rice')
+
+    def create_recipe(self, tags=(), ingredients=(), user=None):
+        """Create a recipe linked to tags and ingredients"""
+        recipe = Recipe.objects.create(
+            user=user or self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.set(tags)
+        recipe.ingredients.set(ingredients)
+
+        return recipe
+
+    def test_facet_counts(self):
+        """Test each tag and ingredient counts its linked recipes"""
+        self.create_recipe([self.vegan, self.quick], [self.salt])
+        self.create_recipe([self.vegan], [self.salt, self.rice])
+        self.create_recipe([], [self.rice])
+
+        with self.assertNumQueries(3):
+            res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'tags': {self.vegan.id: 2, self.quick.id: 1},
+            'ingredients': {self.salt.id: 2, self.rice.id: 2},
+        })
+
+    def test_facets_narrowed_by_filters(self):
+        """Test facets count only the recipes the filters match"""
+        self.create_recipe([self.vegan, self.quick], [self.salt])
+        self.create_recipe([self.vegan], [self.rice])
+        self.create_recipe([self.quick], [self.salt, self.rice])
+
+        res = self.client.get(FACETS_URL, {
+            'tags': f'{self.vegan.id}',
+            'ingredients': f'{self.salt.id},{self.rice.id}',
+        })
+
+        self.assertEqual(res.data, {
+            'tags': {self.vegan.id: 2, self.quick.id: 1},
+            'ingredients': {self.salt.id: 1, self.rice.id: 1},
+        })
+
+    def test_facets_limited_to_user(self):
+        """Test another user's recipes aren't counted"""
+        user2 = get_user_model().objects.create_user(
+            'other@testing.com',
+            'TestPasswd123@'
+        )
+        tag = Tag.objects.create(user=user2, name='Vegan')
+        self.create_recipe([tag], user=user2)
+
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.data, {'tags': {}, 'ingredients': {}})
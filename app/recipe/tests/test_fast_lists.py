@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import response_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class FastListTests(TestCase):
+    """Test fast list pages are byte for byte the serializers' output"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        response_cache.clear()
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Vegan', 'Quick', 'Dessert', 'Unused']
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ['Salt', 'Crème fraîche', 'Tofu']
+        ]
+        for i, (title, price) in enumerate([
+            ('Soup', Decimal('5.00')),
+            ('Crêpes "au sucre"', Decimal('0.5')),
+            ('Tofu stir fry', Decimal('999.99')),
+        ]):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=10 * i,
+                price=price,
+                link='https://example.com/' if i else '',
+                image_variants={'160': {'jpeg': f'uploads/recipe/{i}.jpg'}}
+            )
+            # Link in descending id order to show the order is settled
+            recipe.tags.add(*reversed(tags[:i + 1]))
+            recipe.ingredients.add(*reversed(ingredients[i:]))
+
+    def assertSameContent(self, url, params=None):
+        """Assert the fast and serializer paths return the same bytes"""
+        responses = []
+        for fast in (False, True):
+            response_cache.clear()
+            with override_settings(RECIPE_FAST_LISTS=fast):
+                res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            responses.append(res.content)
+
+        self.assertEqual(responses[0], responses[1])
+
+        return responses[1]
+
+    def test_recipe_list(self):
+        """Test recipe lists match, including prices, links and images"""
+        content = self.assertSameContent(RECIPES_URL)
+
+        self.assertIn(b'"price":"0.50"', content)
+        self.assertIn(b'http://testserver/media/uploads/recipe/0.jpg', content)
+
+    def test_recipe_list_pages(self):
+        """Test paginated recipe lists match, cursors included"""
+        self.assertSameContent(RECIPES_URL, {'page_size': 2})
+
+    def test_recipe_list_filtered_and_searched(self):
+        """Test filtered and ranked search results match"""
+        tag = Tag.objects.get(name='Quick')
+        self.assertSameContent(RECIPES_URL, {'tags': str(tag.id)})
+        self.assertSameContent(RECIPES_URL, {'search': 'tofu'})
+
+    def test_recipe_list_fields(self):
+        """Test sparse fieldsets match"""
+        self.assertSameContent(RECIPES_URL, {'fields': 'tags,title'})
+        self.assertSameContent(RECIPES_URL, {'fields': 'price'})
+
+    def test_attr_lists(self):
+        """Test tag and ingredient lists match, with and without counts"""
+        for url in (TAGS_URL, INGREDIENTS_URL):
+            self.assertSameContent(url)
+            self.assertSameContent(url, {'assigned_only': 1})
+            self.assertSameContent(url, {'with_counts': 1, 'page_size': 2})
+            self.assertSameContent(url, {'fields': 'name'})
+
+    def test_fast_list_queries(self):
+        """Test a fast recipe page takes a query per relation"""
+        with override_settings(RECIPE_FAST_LISTS=True):
+            with self.assertNumQueries(4):
+                res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 3)
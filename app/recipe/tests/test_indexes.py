@@ -0,0 +1,124 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL EXPLAIN')
+class ListQueryPlanTests(TestCase):
+    """Test the list endpoints' queries can be answered from indexes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='salt'
+        )
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(self.tag)
+        recipe.ingredients.add(self.ingredient)
+
+    def explain_list(self, url, params=None):
+        """Return the EXPLAIN output of every query url runs"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        plans = []
+        with connection.cursor() as cursor:
+            # Tiny test tables are cheapest to scan sequentially and sort,
+            # so make the planner show which index it would use at scale
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+            for query in queries.captured_queries:
+                cursor.execute(f'EXPLAIN {query["sql"]}')
+                plans.extend(row[0] for row in cursor.fetchall())
+
+        return '\n'.join(plans)
+
+    def analyze(self):
+        """Refresh the planner's statistics for the recipe table"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_recipe')
+
+    def test_recipe_list_uses_user_id_index(self):
+        """Test listing recipes scans the (user, id) index"""
+        plan = self.explain_list(RECIPES_URL)
+
+        self.assertIn('core_recipe_user_id_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_tag_list_uses_user_name_index(self):
+        """Test listing tags scans the (user, name, id) index"""
+        plan = self.explain_list(TAGS_URL)
+
+        self.assertIn('core_tag_user_name_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_ingredient_list_uses_user_name_index(self):
+        """Test listing ingredients scans the (user, name, id) index"""
+        plan = self.explain_list(INGREDIENTS_URL)
+
+        self.assertIn('core_ingredient_user_name_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_recipe_filters_use_index_scans(self):
+        """Test filtering recipes by tag and ingredient avoids seq scans"""
+        plan = self.explain_list(RECIPES_URL, {
+            'tags': str(self.tag.id),
+            'ingredients': str(self.ingredient.id)
+        })
+
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_autocomplete_uses_prefix_index(self):
+        """Test autocomplete reads names in order from the prefix index"""
+        url = reverse('recipe:ingredient-autocomplete')
+        plan = self.explain_list(url, {'q': 'sa'})
+
+        self.assertIn('core_ingredient_user_name_prefix_idx', plan)
+        self.assertNotIn('Sort', plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_recipe_search_uses_gin_index(self):
+        """Test searching recipes scans the search vector GIN index"""
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, title=f'Stew {i}', time_minutes=10,
+                   price=5.00)
+            for i in range(2000)
+        ])
+        Recipe.objects.filter(user=self.user).update_search_vector()
+        self.analyze()
+        # ANALYZE's row estimates outlive the test's transaction, so leave
+        # them as they were for the other plan tests
+        self.addCleanup(self.analyze)
+        self.addCleanup(
+            Recipe.objects.filter(title__startswith='Stew ').delete
+        )
+
+        plan = self.explain_list(RECIPES_URL, {'search': 'salt'})
+
+        self.assertIn('core_recipe_search_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
@@ -10,6 +10,8 @@ from core.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
+INGREDIENTS_BULK_URL = reverse('recipe:ingredient-bulk-get-or-create')
+INGREDIENTS_AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
 
 
 class PublicIngredientsApiTests(TestCase):
@@ -46,7 +48,7 @@ class PrivateIngredientsApiTests(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test that user only receives own ingredient"""
@@ -60,8 +62,8 @@ class PrivateIngredientsApiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
 
     def test_create_ingredient_successful(self):
         """Test that we can create a ingredient successfully"""
@@ -98,8 +100,8 @@ class PrivateIngredientsApiTests(TestCase):
         serializer1 = IngredientSerializer(ingredient1)
         serializer2 = IngredientSerializer(ingredient2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_ingredients_assigned_unique(self):
         """Test filtering ingredient by assigned are unique"""
@@ -121,4 +123,57 @@ class PrivateIngredientsApiTests(TestCase):
         recipe2.ingredients.add(ingredient1)
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_bulk_get_or_create_ingredients(self):
+        """Test syncing ingredient names returns one object per name"""
+        salt = Ingredient.objects.create(user=self.user, name='salt')
+        payload = {'names': ['Salt', 'pepper', 'kale']}
+
+        res = self.client.post(INGREDIENTS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [ingredient['name'] for ingredient in res.data],
+            ['salt', 'pepper', 'kale']
+        )
+        self.assertEqual(res.data[0]['id'], salt.id)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(),
+            3
+        )
+
+    def test_autocomplete_ingredients(self):
+        """Test autocomplete returns the user's names starting with q"""
+        user2 = get_user_model().objects.create_user(
+            'other@testing.com',
+            'OtherPass321!'
+        )
+        Ingredient.objects.create(user=user2, name='Salt flakes')
+        for name in ['salt', 'Salted butter', 'Sage', 'Sea salt', 'sal_t']:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(INGREDIENTS_AUTOCOMPLETE_URL, {'q': 'SAL'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [ingredient['name'] for ingredient in res.data],
+            ['salt', 'Salted butter', 'sal_t']
+        )
+
+    def test_autocomplete_ingredients_limit(self):
+        """Test autocomplete returns at most limit names"""
+        for name in ['sage', 'salt', 'sugar']:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(
+            INGREDIENTS_AUTOCOMPLETE_URL,
+            {'q': 's', 'limit': 2}
+        )
+        invalid = self.client.get(INGREDIENTS_AUTOCOMPLETE_URL, {'limit': 0})
+
+        self.assertEqual(
+            [ingredient['name'] for ingredient in res.data],
+            ['sage', 'salt']
+        )
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
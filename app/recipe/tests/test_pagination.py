@@ -0,0 +1,125 @@
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def make_cursor(position):
+    """Return a cursor holding an arbitrary position"""
+    return base64.urlsafe_b64encode(
+        json.dumps({'p': position}).encode()
+    ).decode('ascii')
+
+
+class KeysetPaginationTests(TestCase):
+    """Test cursor pagination of the recipe app list endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, params):
+        """Follow next links from url and return every page's results"""
+        pages = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data['results'])
+            if not res.data['next']:
+                return pages
+            res = self.client.get(res.data['next'])
+
+    def test_recipes_paginated_newest_first(self):
+        """Test recipes are paged by descending id without gaps"""
+        recipes = [
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=5.00
+            )
+            for i in range(5)
+        ]
+
+        pages = self.walk(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        ids = [recipe['id'] for page in pages for recipe in page]
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_tags_paginated_by_name(self):
+        """Test tags are paged by descending name without gaps"""
+        for name in ['vegan', 'dessert', 'spicy', 'quick', 'cheap']:
+            Tag.objects.create(user=self.user, name=name)
+
+        pages = self.walk(TAGS_URL, {'page_size': 2})
+
+        names = [tag['name'] for page in pages for tag in page]
+        self.assertEqual(
+            names,
+            ['vegan', 'spicy', 'quick', 'dessert', 'cheap']
+        )
+
+    def test_previous_link_returns_prior_page(self):
+        """Test following previous from the second page gives the first"""
+        for name in ['a', 'b', 'c', 'd']:
+            Tag.objects.create(user=self.user, name=name)
+
+        first = self.client.get(TAGS_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(previous.data['results'], first.data['results'])
+        self.assertIsNone(previous.data['previous'])
+        self.assertEqual(previous.data['next'], first.data['next'])
+
+    def test_page_size_bounded(self):
+        """Test page_size can't exceed the configured maximum"""
+        Tag.objects.bulk_create([
+            Tag(user=self.user, name=f'tag {i}') for i in range(505)
+        ])
+
+        res = self.client.get(TAGS_URL, {'page_size': 10000})
+
+        self.assertEqual(len(res.data['results']), 500)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor returns not found"""
+        res = self.client.get(TAGS_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_wrong_types(self):
+        """Test a cursor whose values don't fit the ordering is not found"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        for position in (['Vegan', 'abc'], [{'a': 1}, 1], ['Vegan', [1]]):
+            res = self.client.get(TAGS_URL, {'cursor': make_cursor(position)})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(RECIPES_URL, {
+            'search': 'soup',
+            'cursor': make_cursor(['high', 1])
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(TAGS_URL, {'cursor': make_cursor(['W', '5'])})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,168 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from core.tests.utils import QueryBudgetMixin
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test that endpoint query counts don't depend on result size"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='salt'
+        )
+        self.add_recipes(2)
+
+    def add_recipes(self, count):
+        """Create recipes linked to several tags and ingredients"""
+        recipes = []
+        start = Recipe.objects.count()
+        for i in range(start, start + count):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=5.00
+            )
+            tag = Tag.objects.create(user=self.user, name=f'tag {i}')
+            ingredient = Ingredient.objects.create(
+                user=self.user,
+                name=f'ingredient {i}'
+            )
+            recipe.tags.add(self.tag, tag)
+            recipe.ingredients.add(self.ingredient, ingredient)
+            recipes.append(recipe)
+
+        return recipes
+
+    def get(self, url, params=None):
+        """Request url and check it succeeded"""
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res
+
+    def test_recipe_list_query_budget(self):
+        """Test listing recipes runs a fixed number of queries"""
+        self.assertQueriesConstant(
+            lambda: self.get(RECIPES_URL),
+            lambda: self.add_recipes(10),
+            max_queries=4
+        )
+
+    def test_recipe_list_filtered_query_budget(self):
+        """Test filtering recipes runs a fixed number of queries"""
+        params = {
+            'tags': str(self.tag.id),
+            'ingredients': str(self.ingredient.id)
+        }
+        self.assertQueriesConstant(
+            lambda: self.get(RECIPES_URL, params),
+            lambda: self.add_recipes(10),
+            max_queries=4
+        )
+
+    def test_recipe_detail_query_budget(self):
+        """Test recipe details run a fixed number of queries"""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Busy recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        url = detail_url(recipe.id)
+
+        def grow():
+            for new_recipe in self.add_recipes(10):
+                recipe.tags.add(*new_recipe.tags.all())
+                recipe.ingredients.add(*new_recipe.ingredients.all())
+
+        self.assertQueriesConstant(
+            lambda: self.get(url),
+            grow,
+            max_queries=4
+        )
+
+    def test_tag_list_query_budget(self):
+        """Test listing tags runs a fixed number of queries"""
+        self.assertQueriesConstant(
+            lambda: self.get(TAGS_URL, {'assigned_only': 1}),
+            lambda: self.add_recipes(10),
+            max_queries=2
+        )
+
+    def test_tag_list_with_counts_query_budget(self):
+        """Test listing tags with recipe counts runs a fixed number"""
+        self.assertQueriesConstant(
+            lambda: self.get(TAGS_URL, {'with_counts': 1}),
+            lambda: self.add_recipes(10),
+            max_queries=2
+        )
+
+    def test_ingredient_list_query_budget(self):
+        """Test listing ingredients runs a fixed number of queries"""
+        self.assertQueriesConstant(
+            lambda: self.get(INGREDIENTS_URL, {'assigned_only': 1}),
+            lambda: self.add_recipes(10),
+            max_queries=2
+        )
+
+    def test_recipe_create_query_budget(self):
+        """Test creating a recipe resolves all its ids in one query"""
+        def create(count):
+            ingredients = [
+                Ingredient.objects.create(user=self.user, name=f'{count} {i}')
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(RECIPES_URL, {
+                    'title': 'Stew',
+                    'ingredients': [item.id for item in ingredients],
+                    'tags': [self.tag.id],
+                    'time_minutes': 10,
+                    'price': '5.00'
+                }, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        self.assertEqual(create(2), create(30))
+
+    def test_recipe_bulk_create_query_budget(self):
+        """Test bulk creating recipes runs a fixed number of queries"""
+        def bulk_create(count):
+            payload = [{
+                'title': f'Recipe {i}',
+                'ingredients': [self.ingredient.id],
+                'tags': [self.tag.id],
+                'time_minutes': 10,
+                'price': '5.00'
+            } for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(RECIPES_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        self.assertEqual(bulk_create(2), bulk_create(20))
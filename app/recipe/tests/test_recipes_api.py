@@ -1,15 +1,24 @@
+import io
 import os
 from PIL import Image
 import tempfile
+import tracemalloc
+from unittest.mock import patch
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate
+)
 
 from core.models import Ingredient, Recipe, Tag
 
+from recipe import images
 from recipe.serializers import RecipeDetailSerializer, RecipeSerializer
+from recipe.views import RecipeViewSet
 
 RECIPES_URL = reverse('recipe:recipe-list')
 
@@ -80,7 +89,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """Assert only user's recipes are returned"""
@@ -96,8 +105,8 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_view_recipe_details(self):
         """Test viewing full recipe details"""
@@ -171,6 +180,60 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(ingredient1, ingredients)
         self.assertIn(ingredient2, ingredients)
 
+    def test_create_recipe_with_other_users_tag(self):
+        """Test tags owned by another user can't be linked"""
+        user2 = get_user_model().objects.create_user(
+            'another@testing.com',
+            'OtherPasswd321!'
+        )
+        tag = sample_tag(user=user2)
+        payload = {
+            'title': 'Borrowed tag',
+            'tags': [tag.id],
+            'time_minutes': 5,
+            'price': 1.00
+        }
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_reports_all_missing_ingredients(self):
+        """Test every unknown ingredient id is reported at once"""
+        ingredient = sample_ingredient(user=self.user)
+        payload = {
+            'title': 'Mystery stew',
+            'ingredients': [ingredient.id, 9998, 9999],
+            'time_minutes': 5,
+            'price': 1.00
+        }
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        message = str(res.data['ingredients'][0])
+        self.assertIn('9998', message)
+        self.assertIn('9999', message)
+
+    def test_create_recipe_with_malformed_ids(self):
+        """Test fractional and boolean ids are rejected, not rounded"""
+        tag = sample_tag(user=self.user)
+        for bad_id in (tag.id + 0.5, True, '1.5'):
+            payload = {
+                'title': 'Odd ids',
+                'tags': [bad_id],
+                'time_minutes': 5,
+                'price': '1.00'
+            }
+
+            res = self.client.post(RECIPES_URL, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('Incorrect type', str(res.data['tags'][0]))
+        self.assertFalse(Recipe.objects.exists())
+
     def test_partial_recipe_update(self):
         """Test partial update of recipe with PATCH"""
         recipe = sample_recipe(user=self.user)
@@ -228,9 +291,9 @@ class PrivateRecipeApiTests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_filter_recipes_by_ingredient(self):
         """Test returning recipes with a specific ingredient"""
@@ -250,9 +313,177 @@ class PrivateRecipeApiTests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
+
+    def test_filter_recipes_by_tags_unique(self):
+        """Test a recipe matching several tags is only returned once"""
+        recipe = sample_recipe(user=self.user)
+        tag1 = sample_tag(user=self.user, name='vegan')
+        tag2 = sample_tag(user=self.user, name='dessert')
+        recipe.tags.add(tag1, tag2)
+        ingredient1 = sample_ingredient(user=self.user, name='salt')
+        ingredient2 = sample_ingredient(user=self.user, name='sugar')
+        recipe.ingredients.add(ingredient1, ingredient2)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': f'{tag1.id},{tag2.id}',
+            'ingredients': f'{ingredient1.id},{ingredient2.id}'
+        })
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['id'], recipe.id)
+
+    def test_filter_recipes_matching_all_tags(self):
+        """Test tags_match=all only returns recipes with every tag"""
+        recipe1 = sample_recipe(user=self.user, title='Vegan cake')
+        recipe2 = sample_recipe(user=self.user, title='Vegan curry')
+        tag1 = sample_tag(user=self.user, name='vegan')
+        tag2 = sample_tag(user=self.user, name='dessert')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag1)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': f'{tag1.id},{tag2.id}',
+            'tags_match': 'all'
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            RecipeSerializer([recipe1], many=True).data
+        )
+
+    def test_filter_recipes_matching_all_ingredients(self):
+        """Test ingredients_match=all only returns complete matches"""
+        recipe1 = sample_recipe(user=self.user, title='Salted caramel')
+        recipe2 = sample_recipe(user=self.user, title='Caramel')
+        ingredient1 = sample_ingredient(user=self.user, name='salt')
+        ingredient2 = sample_ingredient(user=self.user, name='sugar')
+        recipe1.ingredients.add(ingredient1, ingredient2)
+        recipe2.ingredients.add(ingredient2)
+
+        res = self.client.get(RECIPES_URL, {
+            'ingredients': f'{ingredient1.id},{ingredient2.id}',
+            'ingredients_match': 'all'
+        })
+
+        self.assertEqual(
+            res.data['results'],
+            RecipeSerializer([recipe1], many=True).data
+        )
+
+    def test_filter_recipes_invalid_match(self):
+        """Test an unknown match mode is rejected"""
+        tag = sample_tag(user=self.user)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': str(tag.id),
+            'tags_match': 'some'
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_recipes(self):
+        """Test creating a list of recipes in one request"""
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user)
+        payload = [
+            {
+                'title': 'Salad',
+                'tags': [tag.id],
+                'ingredients': [ingredient.id],
+                'time_minutes': 5,
+                'price': '3.00'
+            },
+            {
+                'title': 'Toast',
+                'tags': [],
+                'ingredients': [],
+                'time_minutes': 2,
+                'price': '1.00'
+            }
+        ]
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        salad = Recipe.objects.get(id=res.data[0]['id'])
+        self.assertEqual(salad.user, self.user)
+        self.assertEqual(list(salad.tags.all()), [tag])
+        self.assertEqual(list(salad.ingredients.all()), [ingredient])
+        self.assertEqual(res.data[0]['tags'], [tag.id])
+        toast = Recipe.objects.get(id=res.data[1]['id'])
+        self.assertEqual(toast.title, 'Toast')
+        self.assertEqual(toast.tags.count(), 0)
+
+    def test_bulk_create_invalid_item_aborts(self):
+        """Test one invalid recipe rejects the whole batch by default"""
+        item = {
+            'tags': [],
+            'ingredients': [],
+            'time_minutes': 5,
+            'price': '3.00'
+        }
+        payload = [dict(item, title='Salad'), dict(item, title='')]
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('title', res.data[1])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_skip_invalid(self):
+        """Test skip_invalid creates valid recipes and reports the rest"""
+        item = {
+            'tags': [],
+            'ingredients': [],
+            'time_minutes': 5,
+            'price': '3.00'
+        }
+        payload = [dict(item, title=''), dict(item, title='Toast')]
+
+        res = self.client.post(
+            f'{RECIPES_URL}?skip_invalid=true',
+            payload,
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['title'], 'Toast')
+        self.assertEqual(len(res.data['errors']), 1)
+        self.assertEqual(res.data['errors'][0]['index'], 0)
+        self.assertIn('title', res.data['errors'][0]['errors'])
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_bulk_create_bad_skip_invalid(self):
+        """Test a skip_invalid value that isn't true or false is rejected"""
+        payload = [{'title': 'Toast', 'time_minutes': 2, 'price': '1.00'}]
+
+        res = self.client.post(
+            f'{RECIPES_URL}?skip_invalid=maybe',
+            payload,
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('skip_invalid', res.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_too_many_recipes(self):
+        """Test oversized batches are rejected"""
+        payload = [
+            {'title': 'Toast', 'time_minutes': 2, 'price': '1.00'}
+        ] * 1001
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
 
 
 class RecipeImageUploadTests(TestCase):
@@ -268,8 +499,19 @@ class RecipeImageUploadTests(TestCase):
         self.recipe = sample_recipe(user=self.user)
 
     def tearDown(self):
+        self.recipe.refresh_from_db()
+        images.delete_variants(self.recipe.image_variants)
         self.recipe.image.delete()
 
+    def upload_image(self, size=(10, 10)):
+        """Upload a JPEG of the given size to the sample recipe"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            img = Image.new('RGB', size)
+            img.save(ntf, format='JPEG')
+            ntf.seek(0)
+            return self.client.post(url, {'image': ntf}, format='multipart')
+
     def test_upload_image_to_recipe(self):
         """Test uploading image to a recipe"""
         url = image_upload_url(self.recipe.id)
@@ -290,3 +532,157 @@ class RecipeImageUploadTests(TestCase):
         res = self.client.post(url, {'image': 'notimage'}, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('recipe.views.images.schedule_variants')
+    def test_upload_image_schedules_variants(self, mock_schedule):
+        """Test uploading an image queues its variants for rendering"""
+        res = self.upload_image()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_variants'], {})
+        mock_schedule.assert_called_once()
+        self.assertEqual(mock_schedule.call_args[0][0].id, self.recipe.id)
+
+    @patch('recipe.views.images.schedule_variants')
+    def test_clear_image_schedules_nothing(self, mock_schedule):
+        """Test removing a recipe's image renders no variants"""
+        self.upload_image()
+        self.recipe.refresh_from_db()
+        self.addCleanup(self.recipe.image.storage.delete,
+                        self.recipe.image.name)
+        mock_schedule.reset_mock()
+
+        res = self.client.post(image_upload_url(self.recipe.id),
+                               {'image': ''}, format='multipart')
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(self.recipe.image)
+        mock_schedule.assert_not_called()
+
+    @patch('recipe.views.images.schedule_variants')
+    def test_generate_variants(self, mock_schedule):
+        """Test variants are rendered at each width and exposed as URLs"""
+        self.upload_image(size=(800, 400))
+        self.recipe.refresh_from_db()
+
+        variants = images.generate_variants(
+            self.recipe.id,
+            self.recipe.image.name
+        )
+
+        self.assertEqual(set(variants), {'160', '640', '1280'})
+        storage = images.get_storage()
+        with storage.open(variants['160']['webp']) as variant_file:
+            self.assertEqual(Image.open(variant_file).size, (160, 80))
+        with storage.open(variants['1280']['jpeg']) as variant_file:
+            self.assertEqual(Image.open(variant_file).size, (800, 400))
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertTrue(
+            res.data['image_variants']['640']['jpeg'].startswith('http')
+        )
+        self.assertTrue(
+            res.data['image_variants']['640']['webp'].endswith('_640.webp')
+        )
+
+    @patch('recipe.views.images.schedule_variants')
+    def test_generate_variants_for_replaced_image(self, mock_schedule):
+        """Test variants of an image replaced meanwhile aren't recorded"""
+        self.upload_image()
+        self.recipe.refresh_from_db()
+        stale_name = self.recipe.image.name
+        self.upload_image()
+
+        images.generate_variants(self.recipe.id, stale_name)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, {})
+
+
+@override_settings(
+    RECIPE_IMAGE_MAX_BYTES=2 * 1024 * 1024,
+    RECIPE_IMAGE_MAX_PIXELS=1000 * 1000
+)
+class RecipeImageUploadLimitTests(TestCase):
+    """Tests that image uploads are checked without buffering them"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'testing@testing.com',
+            'TestPasswd123!'
+        )
+        self.recipe = sample_recipe(user=self.user)
+        self.view = RecipeViewSet.as_view({'post': 'upload_image'})
+        # Warm up so lazy imports aren't counted in the first measurement
+        self.upload(b'not an image')
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        if self.recipe.image:
+            self.recipe.image.delete()
+
+    def upload(self, content, name='upload.png'):
+        """Upload content and return the response and peak memory use
+
+        The request body is encoded before measuring starts, so the peak
+        covers only the server's handling of the upload.
+        """
+        upload = io.BytesIO(content)
+        upload.name = name
+        request = APIRequestFactory().post(
+            image_upload_url(self.recipe.id),
+            {'image': upload},
+            format='multipart'
+        )
+        force_authenticate(request, user=self.user)
+        del content, upload
+
+        tracemalloc.start()
+        try:
+            with patch('recipe.views.images.schedule_variants'):
+                res = self.view(request, pk=self.recipe.id)
+            res.render()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            request.close()
+
+        return res, peak
+
+    def png(self, size, mode='L'):
+        """Return the bytes of a blank PNG image"""
+        buffer = io.BytesIO()
+        Image.new(mode, size).save(buffer, format='PNG')
+
+        return buffer.getvalue()
+
+    def test_upload_within_limits(self):
+        """Test an upload close to the byte limit is streamed to disk"""
+        content = self.png((1000, 1000), mode='RGB')
+        content += os.urandom(2 * 1024 * 1024 - 4096 - len(content))
+
+        res, peak = self.upload(content)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertLess(peak, 1024 * 1024)
+
+    def test_upload_too_many_bytes(self):
+        """Test uploads over the byte limit are refused unread"""
+        res, peak = self.upload(os.urandom(8 * 1024 * 1024))
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.assertLess(peak, 1024 * 1024)
+
+    def test_upload_too_many_pixels(self):
+        """Test a small file with huge dimensions is never decoded"""
+        res, peak = self.upload(self.png((20000, 20000), mode='1'))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+        self.assertLess(peak, 1024 * 1024)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
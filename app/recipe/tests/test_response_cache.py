@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+from recipe.cache import response_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+CACHE_STATS_URL = reverse('recipe:cache-stats')
+
+
+class ResponseCacheTests(TestCase):
+    """Test read endpoints are cached until the user's data changes"""
+
+    def setUp(self):
+        response_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def tag_names(self, params=None):
+        """Return the names in the user's tag list"""
+        res = self.client.get(TAGS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [tag['name'] for tag in res.data['results']]
+
+    @override_settings(ALLOWED_HOSTS=['internal', 'public.example.com'])
+    def test_cached_per_host_and_scheme(self):
+        """Test a response isn't replayed with another host's URLs"""
+        Tag.objects.create(user=self.user, name='Fruit')
+        params = {'page_size': 1}
+
+        internal = self.client.get(TAGS_URL, params, HTTP_HOST='internal')
+        public = self.client.get(TAGS_URL, params,
+                                 HTTP_HOST='public.example.com')
+        secure = self.client.get(TAGS_URL, params, secure=True,
+                                 HTTP_HOST='public.example.com')
+
+        self.assertTrue(internal.data['next'].startswith('http://internal/'))
+        self.assertTrue(
+            public.data['next'].startswith('http://public.example.com/')
+        )
+        self.assertTrue(
+            secure.data['next'].startswith('https://public.example.com/')
+        )
+
+    def test_repeat_read_served_from_cache(self):
+        """Test a repeated list only looks up the change version"""
+        first = self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(TAGS_URL)
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(response_cache.stats()['hits'], 1)
+
+    def test_query_params_cached_separately(self):
+        """Test assigned_only gets its own cache entry"""
+        self.assertEqual(self.tag_names(), ['Vegan'])
+        self.assertEqual(self.tag_names({'assigned_only': 1}), [])
+
+    def test_saves_invalidate(self):
+        """Test creating an object invalidates the cached list"""
+        self.tag_names()
+        Tag.objects.create(user=self.user, name='Quick')
+
+        self.assertEqual(self.tag_names(), ['Vegan', 'Quick'])
+
+    def test_link_changes_invalidate(self):
+        """Test changing recipe links invalidates cached lists"""
+        self.tag_names({'assigned_only': 1})
+        self.recipe.tags.add(self.tag)
+
+        self.assertEqual(self.tag_names({'assigned_only': 1}), ['Vegan'])
+
+        self.client.get(RECIPES_URL)
+        self.tag.recipe_set.clear()
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'], [])
+
+    def test_cache_is_per_user(self):
+        """Test one user is never served another's cached list"""
+        self.tag_names()
+        user2 = get_user_model().objects.create_user(
+            'other@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(user2)
+
+        self.assertEqual(self.tag_names(), [])
+
+    def test_cache_stats_staff_only(self):
+        """Test cache counters are reported only to staff"""
+        self.tag_names()
+        self.tag_names()
+
+        res = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['hits'], 1)
+        self.assertEqual(res.data['misses'], 1)
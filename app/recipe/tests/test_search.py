@@ -0,0 +1,118 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class RecipeSearchTests(TestCase):
+    """Test full-text search of recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self, title, tags=(), ingredients=(), user=None):
+        """Create a recipe linked to new tags and ingredients"""
+        user = user or self.user
+        recipe = Recipe.objects.create(
+            user=user,
+            title=title,
+            time_minutes=10,
+            price=5.00
+        )
+        for name in tags:
+            recipe.tags.add(Tag.objects.create(user=user, name=name))
+        for name in ingredients:
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=user, name=name)
+            )
+
+        return recipe
+
+    def search(self, term):
+        """Return the titles of the recipes found by term, in order"""
+        res = self.client.get(RECIPES_URL, {'search': term})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_search_matches_title_tags_and_ingredients(self):
+        """Test search finds recipes by title, tag or ingredient names"""
+        self.create_recipe('Tomato soup')
+        self.create_recipe('Quick pasta', tags=['Tomatoes'])
+        self.create_recipe('Salad', ingredients=['Cherry tomato'])
+        self.create_recipe('Omelette', ingredients=['Eggs'])
+
+        self.assertEqual(
+            sorted(self.search('tomatoes')),
+            ['Quick pasta', 'Salad', 'Tomato soup']
+        )
+
+    def test_title_matches_ranked_first(self):
+        """Test a title match ranks above a tag match"""
+        self.create_recipe('Curry with rice', tags=['Spicy'])
+        self.create_recipe('Spicy curry')
+
+        self.assertEqual(
+            self.search('spicy'),
+            ['Spicy curry', 'Curry with rice']
+        )
+
+    def test_search_limited_to_user(self):
+        """Test search never returns another user's recipes"""
+        user2 = get_user_model().objects.create_user(
+            'other@testing.com',
+            'TestPasswd123@'
+        )
+        self.create_recipe('Lentil soup', user=user2)
+
+        self.assertEqual(self.search('soup'), [])
+
+    def test_search_follows_renames_and_deletes(self):
+        """Test the index follows changes to linked names"""
+        recipe = self.create_recipe('Stew', tags=['Winter'])
+        tag = recipe.tags.get()
+
+        tag.name = 'Autumn'
+        tag.save()
+        self.assertEqual(self.search('winter'), [])
+        self.assertEqual(self.search('autumn'), ['Stew'])
+
+        tag.delete()
+        self.assertEqual(self.search('autumn'), [])
+
+    def test_search_follows_link_changes(self):
+        """Test the index follows links made from either side"""
+        recipe = self.create_recipe('Stew')
+        tag = Tag.objects.create(user=self.user, name='Hearty')
+
+        tag.recipe_set.add(recipe)
+        self.assertEqual(self.search('hearty'), ['Stew'])
+
+        tag.recipe_set.clear()
+        self.assertEqual(self.search('hearty'), [])
+
+    def test_search_bulk_created_recipes(self):
+        """Test recipes created in bulk are searchable"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        payload = [{
+            'title': title,
+            'ingredients': [],
+            'tags': [tag.id],
+            'time_minutes': 10,
+            'price': '5.00'
+        } for title in ['Falafel', 'Hummus']]
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.search('vegan'), ['Hummus', 'Falafel'])
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class SparseFieldsTests(TestCase):
+    """Test ?fields= narrows both the response and the queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@testing.com',
+            'TestPasswd123@'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=10,
+            price=5.00
+        )
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Salt')
+        )
+
+    def get(self, url, fields):
+        """Return the response and SQL of a GET with ?fields="""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {'fields': fields})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res, [query['sql'] for query in queries.captured_queries]
+
+    def test_recipe_list_fields(self):
+        """Test only the requested columns are loaded, with no prefetch"""
+        res, queries = self.get(RECIPES_URL, 'id,title')
+
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipe.id, 'title': 'Soup'}]
+        )
+        self.assertEqual(len(queries), 2)
+        self.assertIn('"core_recipe"."title"', queries[1])
+        self.assertNotIn('"core_recipe"."image"', queries[1])
+        self.assertNotIn('"core_recipe"."price"', queries[1])
+
+    def test_recipe_list_prefetches_requested_relation(self):
+        """Test only the requested relations are prefetched"""
+        res, queries = self.get(RECIPES_URL, 'title,tags')
+
+        self.assertEqual(
+            res.data['results'],
+            [{'title': 'Soup', 'tags': [self.tag.id]}]
+        )
+        self.assertEqual(len(queries), 3)
+        self.assertIn('core_recipe_tags', queries[2])
+
+    def test_recipe_detail_keeps_nested_fields(self):
+        """Test nested objects in details aren't trimmed"""
+        res, _ = self.get(detail_url(self.recipe.id), 'title,tags')
+
+        self.assertEqual(res.data, {
+            'title': 'Soup',
+            'tags': [{'id': self.tag.id, 'name': 'Vegan'}],
+        })
+
+    def test_tag_list_fields(self):
+        """Test tag lists can be trimmed too"""
+        res, _ = self.get(TAGS_URL, 'name')
+
+        self.assertEqual(res.data['results'], [{'name': 'Vegan'}])
+
+    def test_unknown_field_rejected(self):
+        """Test naming a field the endpoint doesn't have is an error"""
+        res = self.client.get(RECIPES_URL, {'fields': 'id,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
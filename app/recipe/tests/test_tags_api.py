@@ -1,15 +1,21 @@
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.db import connection
+from django.urls import NoReverseMatch, reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag
 
-from recipe.serializers import TagSerializer
+from recipe.serializers import RecipeAttrSerializer, TagSerializer
 
 TAGS_URL = reverse('recipe:tag-list')
+TAGS_BULK_URL = reverse('recipe:tag-bulk-get-or-create')
+TAGS_AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
 
 
 class PublicTagsApiTests(TestCase):
@@ -48,7 +54,7 @@ class PrivateTagsApiTests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test we only return tags for provided user"""
@@ -62,8 +68,18 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+
+    def test_no_tag_detail_route(self):
+        """Test tags have no detail endpoint"""
+        tag = Tag.objects.create(user=self.user, name='vegan')
+
+        res = self.client.get(f'{TAGS_URL}{tag.id}/')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        with self.assertRaises(NoReverseMatch):
+            reverse('recipe:tag-detail', args=[tag.id])
 
     def test_create_tags_successful(self):
         """Testing creation of tags"""
@@ -100,8 +116,8 @@ class PrivateTagsApiTests(TestCase):
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_tags_assigned_unique(self):
         """Test filtering tag by assigned are unique"""
@@ -123,4 +139,113 @@ class PrivateTagsApiTests(TestCase):
         recipe2.tags.add(tag1)
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_retrieve_tags_with_counts(self):
+        """Test tags can be listed with their recipe counts"""
+        tag1 = Tag.objects.create(user=self.user, name='vegan')
+        tag2 = Tag.objects.create(user=self.user, name='vegetarian')
+        for title in ['Something tasty', 'Something else']:
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=10,
+                price=5.00
+            )
+            recipe.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {'with_counts': 1})
+        assigned = self.client.get(
+            TAGS_URL,
+            {'with_counts': 'true', 'assigned_only': 'true'}
+        )
+
+        self.assertEqual(res.data['results'], [
+            {'id': tag2.id, 'name': tag2.name, 'recipe_count': 0},
+            {'id': tag1.id, 'name': tag1.name, 'recipe_count': 2},
+        ])
+        self.assertEqual(assigned.data['results'], [
+            {'id': tag1.id, 'name': tag1.name, 'recipe_count': 2},
+        ])
+
+    def test_bad_flag_rejected(self):
+        """Test with_counts and assigned_only must be true or false"""
+        for param in ('with_counts', 'assigned_only'):
+            res = self.client.get(TAGS_URL, {param: 'maybe'})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(param, res.data)
+
+    def test_create_duplicate_tag_fails(self):
+        """Test a tag differing from an existing one only in case fails"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.post(TAGS_URL, {'name': 'vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_create_duplicate_tag_race(self):
+        """Test a duplicate created after validation is still a 400"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        # As if the other tag was created between validating and saving
+        with patch.object(RecipeAttrSerializer, '_name_taken',
+                          side_effect=[False, True]):
+            res = self.client.post(TAGS_URL, {'name': 'vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['name'][0].code, 'unique')
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_get_or_create_tags(self):
+        """Test existing tags are reused and missing ones created"""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        user2 = get_user_model().objects.create_user(
+            'other@testing.com',
+            'AnotherPass123!'
+        )
+        Tag.objects.create(user=user2, name='dessert')
+        payload = {'names': ['vegan', 'Dessert', 'quick', 'DESSERT']}
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        statements = [
+            query['sql'] for query in queries.captured_queries
+            if 'SAVEPOINT' not in query['sql']
+        ]
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(
+            [tag['name'] for tag in res.data],
+            ['Vegan', 'Dessert', 'quick']
+        )
+        self.assertEqual(res.data[0]['id'], vegan.id)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+
+    def test_bulk_get_or_create_tags_idempotent(self):
+        """Test repeating a sync returns the same tags without writes"""
+        payload = {'names': ['vegan', 'quick']}
+        first = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        with self.assertNumQueries(1):
+            second = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(first.data, second.data)
+
+    def test_bulk_get_or_create_tags_invalid(self):
+        """Test an empty name list is rejected"""
+        res = self.client.post(TAGS_BULK_URL, {'names': []}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_tags(self):
+        """Test autocomplete matches tag name prefixes literally"""
+        for name in ['Vegan', 'vegetarian', 'Veg%', 'Quick']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'veg%'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['name'] for tag in res.data], ['Veg%'])
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# Allowance for the multipart boundaries and headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('Upload exceeds the maximum size of {max_bytes} bytes.')
+    default_code = 'too_large'
+
+    def __init__(self, max_bytes):
+        super().__init__(self.default_detail.format(max_bytes=max_bytes))
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to a temporary file, stopping at a byte limit
+
+    Requests whose declared length is already too large are refused
+    before any of the body is read.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = getattr(
+            settings,
+            'RECIPE_IMAGE_MAX_BYTES',
+            10 * 1024 * 1024
+        )
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """Refuse the request if its Content-Length is over the limit"""
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            raise UploadTooLarge(self.max_bytes)
+
+    def receive_data_chunk(self, raw_data, start):
+        """Write a chunk to disk unless it takes the file over the limit"""
+        if start + len(raw_data) > self.max_bytes:
+            self.file.close()
+            raise UploadTooLarge(self.max_bytes)
+
+        return super().receive_data_chunk(raw_data, start)
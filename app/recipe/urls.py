@@ -12,5 +12,11 @@ router.register('recipes', views.RecipeViewSet)
 app_name = 'recipe'
 
 urlpatterns = [
-    path('', include(router.urls))
+    path('', include(router.urls)),
+    path('cache-stats/', views.CacheStatsView.as_view(), name='cache-stats'),
+    path(
+        'slow-queries/',
+        views.SlowQueriesView.as_view(),
+        name='slow-queries'
+    )
 ]
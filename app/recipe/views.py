@@ -1,61 +1,181 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
 from rest_framework import mixins, status, viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from core.models import Ingredient, Recipe, Tag
-from recipe import serializers
+from core.replicas import ReplicaReadMixin
+from core.slowqueries import slow_query_log
+from recipe import images, serializers
+from recipe.cache import response_cache
+from recipe.export import EXPORT_FIELDS, export_rows
+from recipe.mixins import CachedResponseMixin, ChangeVersionETagMixin, \
+    FastListMixin, SparseFieldsMixin
+from recipe.pagination import KeysetPagination
+from recipe.renderers import CSVRenderer, NDJSONRenderer
+from recipe.uploadhandlers import BoundedImageUploadHandler
+from user.authentication import CachedTokenAuthentication
+
 
+def query_flag(request, name):
+    """Return a true/false query parameter, False if it isn't given"""
+    value = request.query_params.get(name)
+    if value is None:
+        return False
+    try:
+        return BooleanField().to_internal_value(value)
+    except ValidationError as exc:
+        raise ValidationError({name: exc.detail})
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
+
+class BaseRecipeAttrViewSet(ReplicaReadMixin,
+                            ChangeVersionETagMixin,
+                            CachedResponseMixin,
+                            SparseFieldsMixin,
+                            FastListMixin,
+                            viewsets.GenericViewSet,
                             mixins.CreateModelMixin,
                             mixins.ListModelMixin):
     """Common attributes across model viewsets"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Return objects for current authenticated user only"""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
-        queryset = self.queryset
+        assigned_only = query_flag(self.request, 'assigned_only')
+        queryset = self.queryset.filter(user=self.request.user)
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.assigned()
+        if self._with_counts():
+            queryset = queryset.with_recipe_count()
+
+        return self.only_requested_fields(queryset.order_by('-name', '-id'))
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-name').distinct()
+    def get_serializer_class(self):
+        """Add recipe counts to listed objects if they were asked for"""
+        if self.action == 'list' and self._with_counts():
+            return self.count_serializer_class
+
+        return self.serializer_class
+
+    def _with_counts(self):
+        """Return whether the request asked for recipe counts"""
+        return query_flag(self.request, 'with_counts')
 
     def perform_create(self, serializer):
         """Create a new object (overriding default)"""
         serializer.save(user=self.request.user)
 
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk_get_or_create(self, request):
+        """Return objects for a list of names, creating any missing ones"""
+        serializer = serializers.NameListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        objects = self.queryset.model.objects.get_or_create_many(
+            request.user,
+            serializer.validated_data['names']
+        )
+
+        return Response(
+            self.get_serializer(objects, many=True).data,
+            status=status.HTTP_200_OK
+        )
+
+    @action(methods=['GET'], detail=False)
+    def autocomplete(self, request):
+        """Return the user's objects whose names start with q"""
+        serializer = serializers.AutocompleteSerializer(
+            data=request.query_params
+        )
+        serializer.is_valid(raise_exception=True)
+        objects = self.queryset.model.objects.autocomplete(
+            request.user,
+            serializer.validated_data['q'],
+            serializer.validated_data['limit']
+        )
+
+        return Response(self.get_serializer(objects, many=True).data)
+
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database"""
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    count_serializer_class = serializers.IngredientCountSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin,
+                    ChangeVersionETagMixin,
+                    CachedResponseMixin,
+                    SparseFieldsMixin,
+                    FastListMixin,
+                    viewsets.ModelViewSet):
     """Manage recipes in database"""
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.defer('search_vector')
     serializer_class = serializers.RecipeSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+    export_chunk_size = 2000
 
     def _params_to_ints(self, qs):
         """Convert a list of string IDS to integers"""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _get_match(self, param):
+        """Return whether a filter should match any or all of its ids"""
+        match = self.request.query_params.get(param, 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError(
+                {param: _('Must be either "any" or "all".')}
+            )
+
+        return match
+
+    def _filter_related(self, queryset, field_name, ids, match):
+        """Filter recipes linked to any or all ids through field_name
+
+        Each condition is an EXISTS on the through table, which can't
+        duplicate recipes the way joining the relation would.
+        """
+        field = Recipe._meta.get_field(field_name)
+        links = field.remote_field.through.objects.filter(
+            **{field.m2m_field_name(): OuterRef('pk')}
+        )
+        related_name = field.m2m_reverse_field_name()
+        if match == 'any':
+            conditions = [links.filter(**{f'{related_name}__in': ids})]
+        else:
+            conditions = [
+                links.filter(**{related_name: related_id})
+                for related_id in sorted(set(ids))
+            ]
+
+        for i, condition in enumerate(conditions):
+            alias = f'_{field_name}_match_{i}'
+            queryset = queryset.annotate(
+                **{alias: Exists(condition)}
+            ).filter(**{alias: True})
+
+        return queryset
+
     def get_queryset(self):
         """Retrieve recipes for authenticated user"""
         tags = self.request.query_params.get('tags')
@@ -63,14 +183,101 @@ class RecipeViewSet(viewsets.ModelViewSet):
         queryset = self.queryset
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_related(
+                queryset,
+                'tags',
+                tag_ids,
+                self._get_match('tags_match')
+            )
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = self._filter_related(
+                queryset,
+                'ingredients',
+                ingredient_ids,
+                self._get_match('ingredients_match')
+            )
 
-        return queryset.filter(
+        queryset = queryset.filter(
             user=self.request.user,
+        ).order_by('-id')
+
+        search = self.request.query_params.get('search', '').strip()
+        if search:
+            queryset = queryset.search(search)
+
+        return self._prefetch_related(self.only_requested_fields(queryset))
+
+    @action(methods=['GET'], detail=False)
+    def facets(self, request):
+        """Return recipe counts per tag and ingredient for the filters"""
+        return self.conditional_response(
+            partial(self.cached_response, self._facets),
+            request
+        )
+
+    def _facets(self, request):
+        """Count the filtered recipes linked to each tag and ingredient"""
+        recipe_ids = self.get_queryset().order_by().values('pk')
+        facets = {}
+        for field_name in ('tags', 'ingredients'):
+            field = Recipe._meta.get_field(field_name)
+            counts = field.remote_field.through.objects.filter(
+                **{f'{field.m2m_field_name()}__in': recipe_ids}
+            ).values_list(field.m2m_reverse_field_name()).annotate(
+                recipes=Count('pk')
+            ).order_by()
+            facets[field_name] = dict(counts)
+
+        return Response(facets)
+
+    @action(methods=['GET'], detail=False,
+            renderer_classes=(NDJSONRenderer, CSVRenderer))
+    def export(self, request):
+        """Stream the user's recipes matching the filters as NDJSON or CSV
+
+        The format is picked with ?format=ndjson|csv or the Accept header.
+        """
+        renderer = request.accepted_renderer
+        # Rows are read after the view returns, so fix the database now
+        queryset = self.get_queryset()
+        response = StreamingHttpResponse(
+            renderer.stream(
+                export_rows(queryset.using(queryset.db),
+                            self.export_chunk_size),
+                EXPORT_FIELDS
+            ),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
         )
+        response['Content-Disposition'] = \
+            f'attachment; filename="recipes.{renderer.format}"'
+
+        return response
+
+    def _prefetch_related(self, queryset):
+        """Prefetch only the related columns the action's serializer needs
+
+        Related objects are listed in id order. Relations left out of
+        ?fields= aren't prefetched at all.
+        """
+        if self.action == 'list':
+            related_fields = ('id',)
+        elif self.action == 'retrieve':
+            related_fields = ('id', 'name')
+        else:
+            return queryset
+
+        requested = self.get_requested_fields()
+        prefetches = [
+            Prefetch(
+                name,
+                queryset=model.objects.only(*related_fields).order_by('id')
+            )
+            for name, model in (('tags', Tag), ('ingredients', Ingredient))
+            if requested is None or name in requested
+        ]
+
+        return queryset.prefetch_related(*prefetches)
 
     def get_serializer_class(self):
         """Determine which serializer to use for request"""
@@ -81,6 +288,25 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
+    def create(self, request, *args, **kwargs):
+        """Create a recipe, or a batch of recipes from a JSON list"""
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        skip_invalid = query_flag(request, 'skip_invalid')
+        serializer.skip_invalid = skip_invalid
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+
+        if skip_invalid:
+            return Response(
+                {'results': serializer.data, 'errors': serializer.item_errors},
+                status=status.HTTP_201_CREATED
+            )
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def perform_create(self, serializer):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
@@ -88,6 +314,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe"""
+        request.upload_handlers = [BoundedImageUploadHandler(request)]
         recipe = self.get_object()
         serializer = self.get_serializer(
             recipe,
@@ -95,7 +322,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            old_variants = recipe.image_variants
+            serializer.save(image_variants={})
+            transaction.on_commit(
+                lambda: images.delete_variants(old_variants)
+            )
+            if serializer.instance.image:
+                images.schedule_variants(serializer.instance)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -105,3 +338,26 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+
+class CacheStatsView(APIView):
+    """Report this process's response cache counters to staff"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(response_cache.stats())
+
+
+class SlowQueriesView(APIView):
+    """Show staff this process's recently logged slow queries"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(slow_query_log.entries())
+
+    def delete(self, request):
+        slow_query_log.clear()
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
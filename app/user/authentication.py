@@ -0,0 +1,55 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+def token_cache():
+    """Return the cache shared by every process for token lookups, if any
+
+    Lookups are only cached where all processes see the same entries, so
+    deleting a token or deactivating its user takes effect everywhere at
+    once rather than when some process's local copy expires.
+    """
+    alias = getattr(settings, 'TOKEN_AUTH_CACHE_ALIAS', None)
+    if alias is None:
+        return None
+
+    return caches[alias]
+
+
+def token_cache_key(key):
+    """Return the cache key for a token without exposing the token"""
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """Drop a token's cached user so its next request hits the database"""
+    cache = token_cache()
+    if cache is not None:
+        cache.delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching each token's user in a shared cache
+
+    Without TOKEN_AUTH_CACHE_ALIAS every request looks its token up.
+    """
+
+    def authenticate_credentials(self, key):
+        """Return the (user, token) for key, from the cache if possible"""
+        cache = token_cache()
+        if cache is None:
+            return super().authenticate_credentials(key)
+
+        cache_key = token_cache_key(key)
+        # Each get unpickles a fresh copy, so changes to request.user
+        # can't leak into other requests
+        cached = cache.get(cache_key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            cache.set(cache_key, cached,
+                      getattr(settings, 'TOKEN_AUTH_CACHE_TIMEOUT', 60))
+
+        return cached
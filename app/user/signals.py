@@ -0,0 +1,36 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_token
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_saved_token(sender, instance, **kwargs):
+    """Stop serving a cached user for a regenerated or deleted token"""
+    transaction.on_commit(partial(invalidate_token, instance.key))
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Reload a user's token on their next request after any change
+
+    This covers deactivation and password changes, and keeps the cached
+    profile returned by the me endpoint current. Tokens are dropped once
+    the change commits, so a request in between can't cache the old user
+    again.
+    """
+    if created:
+        return
+
+    keys = Token.objects.filter(user_id=instance.pk).values_list(
+        'key',
+        flat=True
+    )
+    for key in keys:
+        transaction.on_commit(partial(invalidate_token, key))
@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.urls import reverse
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import token_cache_key
+
+ME_URL = reverse('user:me')
+
+
+@override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+class CachedTokenAuthenticationTests(TransactionTestCase):
+    """Test token lookups are cached and invalidated
+
+    Cached tokens are dropped as writes commit, so each test commits them.
+    """
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@testusers.com',
+            password='TestPasswd3',
+            name='Some Name'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_cached(self):
+        """Test repeat requests authenticate without querying"""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_regenerated_token_rejected(self):
+        """Test the old key stops working once a token is regenerated"""
+        self.client.get(ME_URL)
+        self.token.delete()
+        new_token = Token.objects.create(user=self.user)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {new_token.key}')
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user stops their cached token working"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidated_after_commit(self):
+        """Test a user cached again before a change commits is dropped"""
+        self.client.get(ME_URL)
+        cache_key = token_cache_key(self.token.key)
+        cached = caches['default'].get(cache_key)
+
+        with transaction.atomic():
+            self.user.is_active = False
+            self.user.save()
+            # A concurrent request still reads the committed, active user
+            caches['default'].set(cache_key, cached)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_reloads_user(self):
+        """Test changing password drops the cached user"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'password': 'NewPasswd123'})
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_cached_user_not_shared_between_requests(self):
+        """Test updating the profile is visible on the next request"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'New Name'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+
+    def test_no_copy_kept_per_process(self):
+        """Test dropping the shared entry reaches every process at once"""
+        self.client.get(ME_URL)
+        caches['default'].delete(token_cache_key(self.token.key))
+
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS=None)
+    def test_not_cached_without_shared_cache(self):
+        """Test every request looks its token up without a shared cache"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
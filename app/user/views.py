@@ -1,7 +1,9 @@
-from rest_framework import authentication, generics, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.replicas import ReplicaReadMixin
+from user.authentication import CachedTokenAuthentication
 from user.serializers import AuthTokenSerializer, UserSerializer
 
 
@@ -16,10 +18,10 @@ class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(ReplicaReadMixin, generics.RetrieveUpdateAPIView):
     """Manage authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):